@@ -1,8 +1,6 @@
 import json
 import pickle
 
-from ortools.linear_solver import pywraplp
-
 from data import Map
 from util import load_map
 
@@ -33,6 +31,8 @@ def create_data_model(m: Map = None) -> dict:
 
 
 def main():
+    from ortools.linear_solver import pywraplp
+
     data = create_data_model()
 
     # Create the mip solver with the SCIP backend.
@@ -1,4 +1,3 @@
-import visualizer
 from data import (
     Route,
     BagDescription,
@@ -101,7 +100,9 @@ if __name__ == "__main__":
     mp = load_map()
     print(emulate(sol, mp))
     print(len(sol.moves))
-    visualizer.visualize_route(mp, sol).save("./data/route.png")
+    from visualizer import visualize_route
+
+    visualize_route(mp, sol).save("./data/route.png")
     if input("Send solution? y/n: ").lower() in ("y", "yes"):
         sus_response = send_solution(sol)
         print("=== RESPONSE ===")
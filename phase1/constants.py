@@ -9,6 +9,10 @@ MAP_ID = os.getenv("MAP_ID")
 BASE_URL = "https://datsanta.dats.team"
 SUBMISSION_URL = BASE_URL + "/api/round"
 INFO_URL_TEMPLATE = SUBMISSION_URL + "/%s"
+# simultaneous requests when polling the statuses of the rounds
+STATUS_CONCURRENCY = 8
+# seconds to wait for the status of one round
+STATUS_TIMEOUT = 30
 MAP_URL = BASE_URL + f"/json/map/{MAP_ID}.json"
 AUTH_HEADER = {"X-API-Key": API_KEY}
 
@@ -1,11 +1,15 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
+from math import exp, inf, log
+import random
+import time
 from random import gauss, uniform
 import warnings
 from data import Circle, Coordinates, Line, Path, Route
 from simanneal import Annealer
 
 from util import load_map
-from visualizer import visualize_route
 
 
 @dataclass
@@ -23,20 +27,104 @@ class ObjectiveChecker:
     penalty: callable
 
     def objective(self, path: list[Coordinates]):
-        # TODO: optimize:
-        # write is_len_smaller(path, len) instead
-        # that returns the actual len of the path only in case when it is smaller,
-        # so it can throw summation of path pieces if it finds that the sum is already bigger that the threshold
-
         # context unaware
+        return self.is_len_smaller(path, inf)
+
+    def is_len_smaller(self, path: list[Coordinates], threshold: float) -> float | None:
+        """The len of the path if it is not bigger than the threshold, None otherwise.
+
+        Stops the summation as soon as the sum exceeds the threshold.
+        """
         res = 0
         prev = path[0]
         for pos in path[1:]:
             res += prev.dist(pos) + 6 * self.penalty(pos, prev)
+            if res > threshold:
+                return None
             prev = pos
         return res
 
 
+# a move whose cost is bigger than the current one by this number of temperatures
+# is accepted with probability below exp(-REJECTION_TEMPERATURES), so there is
+# no need to evaluate it completely
+REJECTION_TEMPERATURES = 10
+
+
+class BoundedAnnealer(Annealer):
+    """Annealer that knows the cost above which a move is rejected anyway.
+
+    `anneal` is the one of simanneal, but it keeps the temperature of the current
+    step in `self.T` (simanneal has it only in a local variable), so the bound
+    always follows the schedule actually used.
+    """
+
+    T = inf
+
+    def rejection_bound(self) -> float:
+        return self.energy() + REJECTION_TEMPERATURES * self.T
+
+    def anneal(self):
+        step = 0
+        self.start = time.time()
+        if self.Tmin <= 0.0:
+            raise Exception("Exponential cooling requires a minimum temperature > 0")
+        t_factor = -log(self.Tmax / self.Tmin)
+
+        self.T = self.Tmax
+        E = self.energy()
+        prev_state = self.copy_state(self.state)
+        prev_energy = E
+        self.best_state = self.copy_state(self.state)
+        self.best_energy = E
+        trials, accepts, improves = 0, 0, 0
+        if self.updates > 0:
+            update_wavelength = self.steps / self.updates
+            self.update(step, self.T, E, None, None)
+
+        while step < self.steps and not self.user_exit:
+            step += 1
+            self.T = self.Tmax * exp(t_factor * step / self.steps)
+            dE = self.move()
+            if dE is None:
+                E = self.energy()
+                dE = E - prev_energy
+            else:
+                E += dE
+            trials += 1
+            if dE > 0.0 and exp(-dE / self.T) < random.random():
+                self.state = self.copy_state(prev_state)
+                E = prev_energy
+            else:
+                accepts += 1
+                if dE < 0.0:
+                    improves += 1
+                prev_state = self.copy_state(self.state)
+                prev_energy = E
+                if E < self.best_energy:
+                    self.best_state = self.copy_state(self.state)
+                    self.best_energy = E
+            if self.updates > 1:
+                if (step // update_wavelength) > ((step - 1) // update_wavelength):
+                    self.update(step, self.T, E, accepts / trials, improves / trials)
+                    trials, accepts, improves = 0, 0, 0
+
+        self.state = self.copy_state(self.best_state)
+        if self.save_state_on_exit:
+            self.save_state()
+        return self.best_state, self.best_energy
+
+
+def bounded_length(
+    objective: callable, is_len_smaller: callable | None, path, bound: float
+) -> float:
+    """Length of the path by `is_len_smaller` if given, infinite if over the bound"""
+    if is_len_smaller is None:
+        return objective(path)
+    length = is_len_smaller(path, bound)
+    return inf if length is None else length
+
+
 # TODO: mutators that use coordinate system rotation (they converge very fast)
 
 
@@ -87,6 +175,7 @@ class OptimalPathFinder:
     mutate: callable  # context aware
     objective: callable  # context unaware
     rand_path_generator: callable  # context aware
+    is_len_smaller: callable | None  # like ObjectiveChecker.is_len_smaller
     schedule: dict = {"tmax": 100.0, "tmin": 1, "steps": 340, "updates": 100}
 
     def __init__(
@@ -96,10 +185,12 @@ class OptimalPathFinder:
         objective,
         rand_path_generator=None,
         schedule=None,
+        is_len_smaller=None,
     ):
         self.segmentation = segmentation
         self.mutate = mutate
         self.objective = objective
+        self.is_len_smaller = is_len_smaller
         if rand_path_generator is None:
             self.rand_path_generator = absolute_rand_path
         else:
@@ -110,6 +201,7 @@ class OptimalPathFinder:
     def optimal_path(self, f: Coordinates, t: Coordinates) -> Path:
         mutate = self.mutate
         objective = self.objective
+        is_len_smaller = self.is_len_smaller
 
         l = f.dist(t)
         if l < 200:
@@ -118,10 +210,12 @@ class OptimalPathFinder:
         cos_a = f.x / l
         sin_a = f.y / l
 
-        class PathAnnealer(Annealer):
+        class PathAnnealer(BoundedAnnealer):
             def move(self):
                 path = [f] + mutate(self.state.path[1:-1], cos_a, sin_a, l) + [t]
-                length = objective(path)
+                length = bounded_length(
+                    objective, is_len_smaller, path, self.rejection_bound()
+                )
                 self.state = Path(path, length)
 
             def energy(self):
@@ -158,6 +252,8 @@ def main():
 
     print()
     if input("draw? (y/n): ") == "y":
+        from visualizer import visualize_route
+
         visualize_route(sus_map, Route(best.path, None, None)).save("data/path.png")
 
 
@@ -15,7 +15,6 @@ from data import Path, Route, Coordinates, Line, Circle
 from constants import MAP_ID, MAP_FILE_PATH, IDS_FILE, PRECALC_BASE_FILE
 import os
 from checker import emulate
-import visualizer
 from tqdm import tqdm
 from precalc_base_path import (
     ObjectiveChecker,
@@ -119,7 +118,9 @@ if __name__ == "__main__":
     # print("cache hits: " + json.dumps(cache_hits))
     print(emulate(solution, sus_map))
     if input("visualize? (y/n): ").lower() in ("y", "yes"):
-        visualizer.visualize_route(sus_map, sus_solution).save("data/route.png")
+        from visualizer import visualize_route
+
+        visualize_route(sus_map, sus_solution).save("data/route.png")
     if input("Send solution? y/n: ").lower() in ("y", "yes"):
         sus_response = send_solution(sus_solution)
         print("=== RESPONSE ===")
@@ -1,14 +1,20 @@
+from __future__ import annotations
+
 import argparse
 from dataclasses import dataclass
 import json
 from random import gauss, uniform
 from data import Circle, Coordinates, Line, Path, Route
 from util import edit_json_file, load_map, read_json_file
-from simanneal import Annealer
 from constants import PRECALC_BASE_FILE
-from visualizer import visualize_route
 from tqdm import tqdm
-from optimal_path import WidePathMutator, ObjectiveChecker, PenatyChecker
+from optimal_path import (
+    WidePathMutator,
+    ObjectiveChecker,
+    PenatyChecker,
+    BoundedAnnealer,
+    bounded_length,
+)
 
 import warnings
 
@@ -84,6 +90,7 @@ class OprimalPathFromBaseFinder:
     mutate: callable  # context aware
     objective: callable  # context unaware
     rand_path_from_base: callable  # context aware
+    is_len_smaller: callable | None  # like ObjectiveChecker.is_len_smaller
     schedule: dict = {"tmax": 100.0, "tmin": 1, "steps": 340, "updates": 100}
 
     def __init__(
@@ -93,10 +100,12 @@ class OprimalPathFromBaseFinder:
         objective,
         rand_path_from_base_generator=None,
         schedule=None,
+        is_len_smaller=None,
     ):
         self.segmentation = segmentation
         self.mutate = mutate
         self.objective = objective
+        self.is_len_smaller = is_len_smaller
         if rand_path_from_base_generator is None:
             self.rand_path_from_base = rand_path_from_base
         else:
@@ -107,6 +116,7 @@ class OprimalPathFromBaseFinder:
     def optimal_path(self, f: Coordinates) -> Path:
         mutate = self.mutate
         objective = self.objective
+        is_len_smaller = self.is_len_smaller
 
         l = f.dist(base)
         if l < 200:
@@ -115,10 +125,12 @@ class OprimalPathFromBaseFinder:
         cos_a = f.x / l
         sin_a = f.y / l
 
-        class PathAnnealer(Annealer):
+        class PathAnnealer(BoundedAnnealer):
             def move(self):
                 path = [base] + mutate(self.state.path[1:-1], cos_a, sin_a, l) + [f]
-                length = objective(path)
+                length = bounded_length(
+                    objective, is_len_smaller, path, self.rejection_bound()
+                )
                 self.state = Path(path, length)
 
             def energy(self):
@@ -151,7 +163,8 @@ def main():
 
     circles = [Circle.from_snow(s) for s in sus_map.snow_areas]
     penalty = PenatyChecker(circles).penalty
-    objective = ObjectiveChecker(penalty).objective
+    checker = ObjectiveChecker(penalty)
+    objective = checker.objective
 
     silent = False
 
@@ -168,6 +181,7 @@ def main():
                 "steps": 500,
                 "updates": 500 if not silent else 0,
             },
+            is_len_smaller=checker.is_len_smaller,
         ).optimal_path(f)
 
     if args.all_children:
@@ -228,6 +242,8 @@ def main():
                 )
                 print("path:", path.path[1:-1])
                 if input("draw? (y/n): ") == "y":
+                    from visualizer import visualize_route
+
                     visualize_route(sus_map, Route(path.path, None, None)).save(
                         "data/path.png"
                     )
@@ -248,6 +264,8 @@ def main():
 
         print()
         if input("draw? (y/n): ") == "y":
+            from visualizer import visualize_route
+
             visualize_route(sus_map, Route(best_path.path, None, None)).save(
                 "data/path.png"
             )
@@ -1,9 +1,15 @@
 import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
 from constants import (
     SUBMISSION_URL,
     AUTH_HEADER,
     MAP_URL,
     INFO_URL_TEMPLATE,
+    STATUS_CONCURRENCY,
+    STATUS_TIMEOUT,
     MAP_FILE_PATH,
     SNOW_SPEED,
     BASE_SPEED,
@@ -20,7 +26,22 @@ from data import (
     Line,
     Circle,
 )
-from requests import post, get
+from requests import post, get, Session
+from requests.adapters import HTTPAdapter
+
+
+def dump_json_atomic(obj, path: str) -> None:
+    """Writes to a temporary file first, so the old content survives a crash"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            json.dump(obj, tmp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
 
 class edit_json_file:
@@ -76,6 +97,35 @@ def get_solution_info(solution_id: str) -> RoundInfo:
     return RoundInfo.from_json(response.text)
 
 
+def get_solutions_info(
+    solution_ids: list[str],
+    max_workers: int = STATUS_CONCURRENCY,
+    url_template: str = INFO_URL_TEMPLATE,
+    timeout: float = STATUS_TIMEOUT,
+) -> dict[str, RoundInfo | str]:
+    """Fetches the rounds concurrently over one keep-alive session.
+
+    A round that could not be fetched gets the error message instead of the info.
+    """
+    if not solution_ids:
+        return {}
+    with Session() as session, ThreadPoolExecutor(max_workers) as pool:
+        session.headers.update(AUTH_HEADER)
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def fetch(solution_id: str) -> RoundInfo | str:
+            try:
+                response = session.get(url_template % solution_id, timeout=timeout)
+                return RoundInfo.from_json(response.text)
+            # network errors and responses that are not round infos
+            except Exception as e:
+                return repr(e)
+
+        return dict(zip(solution_ids, pool.map(fetch, solution_ids)))
+
+
 def save(instance, path: str) -> None:
     with open(path, "w") as map_file:
         map_file.write(instance.to_json())
@@ -15,7 +15,6 @@ from checker import segment_dist, segment_time
 from constants import BASE_SPEED, TIMES_MATRIX_PATH, MAP_ID, PRECALC_BASE_FILE
 from copy import deepcopy
 
-from visualizer import visualize_route
 
 
 def update_matrix(matrix: Matrix, vertices: list[Coordinates]) -> Matrix:
@@ -5,6 +5,7 @@ from collections import defaultdict
 from pyeasyga import pyeasyga
 from dataclass_wizard import JSONWizard
 from dataclasses import dataclass
+from functools import cached_property
 
 from tqdm import tqdm
 
@@ -105,8 +106,6 @@ def make_initial_weights() -> AgeToWeights:
 
 
 class FunctionSearcher(pyeasyga.GeneticAlgorithm):
-    map_data = load_map()
-
     def __init__(self, *args, from_scratch=False, **kwargs):
         super().__init__(*args, **kwargs)
         self.fitness_function = self.fitness
@@ -115,6 +114,11 @@ class FunctionSearcher(pyeasyga.GeneticAlgorithm):
         self.mutate_function = self.mut
         self.from_scratch = from_scratch
 
+    @cached_property
+    def map_data(self) -> Map:
+        # loaded on first use, so importing this module does not read the map
+        return load_map()
+
     def fitness(self, individual: Weights, data: SolutionData):
         tot_err = 0
         for sol, score in data.values():
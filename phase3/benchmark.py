@@ -0,0 +1,203 @@
+"""Timings of the geometry and routing hot paths on the checked-in maps.
+
+Prints (or writes with -o) JSON with the timings and the commit they were taken
+on, so runs on different commits can be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Callable
+
+import numba
+import numpy as np
+
+from checker import emulate, validate
+from constants import MAP_FILE_PATH
+from data import Circle, Coordinates, Line, Solution, SnowArea
+from precalc_base_path import (
+    MOVED_POINTS,
+    OprimalPathFromBaseFinder,
+    PathFromBaseMutator,
+    make_objective_checker,
+)
+from time_matrix import time_matrix
+from util import load, load_map, path_len, segment_dist, warm_up
+
+# phase1 maps have no gifts for phase3 data classes, so only their geometry is used
+MAPS = {"phase1": "../phase1/data/map.json", "phase3": MAP_FILE_PATH}
+SOLUTION_PATH = "./data/solutions/best.json"
+SEED = 42
+
+SIZES = {
+    "distance_in_circle": [100, 1000],
+    "segment_dist": [100, 1000, 10000],
+    "path_len": [10, 100, 1000],
+    "time_matrix": [100, 300, 1001],
+    "anneal": [250, 1000],
+}
+QUICK_SIZES = {
+    "distance_in_circle": [100],
+    "segment_dist": [100],
+    "path_len": [100],
+    "time_matrix": [100],
+    "anneal": [250],
+}
+
+
+class MapGeometry:
+    def __init__(self, path: str):
+        with open(path, "r") as inp:
+            raw = json.load(inp)
+        snow = raw.get("snowAreas", raw.get("snowArea"))
+        self.snow_areas = [SnowArea.from_dict(s) for s in snow]
+        self.children = [Coordinates(c["x"], c["y"]) for c in raw["children"]]
+
+    def segments(self, n: int) -> list[tuple[Coordinates, Coordinates]]:
+        rng = np.random.default_rng(SEED)
+        pairs = rng.integers(0, len(self.children), size=(n, 2))
+        return [(self.children[a], self.children[b]) for a, b in pairs if a != b]
+
+    def vertices(self, n: int) -> list[Coordinates]:
+        return ([Coordinates(0, 0)] + self.children)[:n]
+
+
+def measure(fn: Callable[[], object], repeats: int) -> dict:
+    fn()  # JIT, caches
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "repeats": repeats,
+        "min": min(times),
+        "median": statistics.median(times),
+    }
+
+
+def geometry_cases(geometry: MapGeometry, sizes: dict[str, list[int]]):
+    circles = [Circle.from_snow(s) for s in geometry.snow_areas]
+    snow_areas = geometry.snow_areas
+
+    for n in sizes["distance_in_circle"]:
+        lines = [Line.from_two_points(a, b) for a, b in geometry.segments(n)]
+        yield "distance_in_circle", n, lambda lines=lines: [
+            line.distance_in_circle(c) for line in lines for c in circles
+        ]
+
+    for n in sizes["segment_dist"]:
+        segments = geometry.segments(n)
+        yield "segment_dist", n, lambda segments=segments: [
+            segment_dist(a, b, snow_areas) for a, b in segments
+        ]
+
+    for n in sizes["path_len"]:
+        moves = geometry.vertices(n)
+        yield "path_len", n, lambda moves=moves: path_len(moves, snow_areas)
+
+    for n in sizes["time_matrix"]:
+        vertices = geometry.vertices(n)
+        yield "time_matrix", n, lambda vertices=vertices: time_matrix(
+            vertices, snow_areas
+        )
+
+
+def phase3_cases(sizes: dict[str, list[int]]):
+    sus_map = load_map()
+    solution: Solution = load(Solution, SOLUTION_PATH)
+    yield "validate", len(solution.moves), lambda: validate(solution, sus_map)
+    yield "emulate", len(solution.moves), lambda: emulate(
+        solution, sus_map, report_path=None
+    )
+
+    checker = make_objective_checker(sus_map)
+    target = sus_map.children[0].coords()
+
+    def anneal(steps: int):
+        random.seed(SEED)
+        OprimalPathFromBaseFinder(
+            int(target.dist(Coordinates(0, 0)) // 2000),
+            PathFromBaseMutator(2000, 2000, points=MOVED_POINTS).mutate,
+            checker.objective,
+            schedule={"tmax": 100, "tmin": 1, "steps": steps, "updates": 0},
+            segment_costs=checker.segment_costs,
+            bounded_objective=checker.bounded_objective,
+        ).optimal_path(target)
+
+    for steps in sizes["anneal"]:
+        yield "anneal", steps, lambda steps=steps: anneal(steps)
+
+
+def git_commit() -> str | None:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    parser.add_argument("-r", "--repeats", type=int, default=5)
+    parser.add_argument("-q", "--quick", action="store_true", help="small sizes only")
+    parser.add_argument("-b", "--bench", action="append", help="run only these")
+    args = parser.parse_args()
+    sizes = QUICK_SIZES if args.quick else SIZES
+
+    warm_up()
+    cases = [
+        (name, case)
+        for name, path in MAPS.items()
+        for case in geometry_cases(MapGeometry(path), sizes)
+    ]
+    cases += [("phase3", case) for case in phase3_cases(sizes)]
+
+    results = []
+    for map_name, (bench, size, fn) in cases:
+        if args.bench and bench not in args.bench:
+            continue
+        result = {"map": map_name, "bench": bench, "size": size}
+        result.update(measure(fn, args.repeats))
+        print(
+            f"{map_name:7} {bench:20} {size:6} {result['median'] * 1000:10.2f} ms",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,6 @@ import json
 import os.path
 import pickle
 
-from ortools.linear_solver import pywraplp
-
 from data import Map, Gift
 from util import load_map
 
@@ -37,6 +35,8 @@ def solve_bin_pack(gifts: list[Gift], time_limit=3000) -> list[dict] | None:
     if os.path.exists("./data/bin_packing_result.json"):
         with open("./data/bin_packing_result.json", "r") as inp:
             return json.load(inp)
+    from ortools.linear_solver import pywraplp
+
     data = create_data_model(gifts)
 
     # Create the mip solver with the SCIP backend.
@@ -1,4 +1,10 @@
 # import visualizer
+import json
+from contextlib import nullcontext
+from itertools import chain
+
+import numpy as np
+
 from data import (
     Solution,
     BagDescription,
@@ -7,14 +13,20 @@ from data import (
     RoundInfoData,
     Line,
     Circle,
-    EmulatorReport,
     EmulatorReportSegment,
     SnowArea,
-    Child,
 )
-from constants import BAG_MAX_WEIGHT, BAG_MAX_VOLUME, BASE_SPEED, SNOW_SPEED, IDS_FILE
+from constants import (
+    BAG_MAX_WEIGHT,
+    BAG_MAX_VOLUME,
+    BASE_SPEED,
+    SNOW_SPEED,
+    IDS_FILE,
+    MAX_MONEY,
+    MAX_COORD,
+    REPORT_PATH,
+)
 from util import (
-    save,
     load,
     load_map,
     send_solution,
@@ -23,70 +35,154 @@ from util import (
     cleanup_jumps_to_start,
     segment_dist,
     segment_time,
+    warm_up,
 )
+from happiness_estimator import Weights, eval_deliveries, load_weights
+from map_arrays import load_map_arrays
+
+
+class ReportWriter:
+    """Emulator report as NDJSON: a line per segment, the totals on the last one"""
+
+    def __init__(self, path: str):
+        self.out = open(path, "w")
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.out.close()
+
+    def write_segment(self, segment: EmulatorReportSegment) -> None:
+        self.out.write(segment.to_json() + "\n")
+
+    def write_totals(self, total_distance: float, distance_in_snow: float) -> None:
+        totals = {"totalDistance": total_distance, "distanceInSnow": distance_in_snow}
+        self.out.write(json.dumps(totals) + "\n")
 
 
 def is_bag_valid(bag: BagDescription) -> bool:
     return bag.weight <= BAG_MAX_WEIGHT and bag.volume <= BAG_MAX_VOLUME
 
 
-def emulate(solution: Solution, map_data: Map) -> RoundInfoData:
-    gifts = sum(solution.stack_of_bags, [])
-    assert len(gifts) == len(map_data.children)
+def validate(solution: Solution, map_data: Map) -> str | None:
+    """Why the solution is invalid, None if it is valid.
+
+    Checks the gifts, the bags and that the route delivers all of them, but does
+    not compute any distances, so it is linear in the size of the solution.
+    """
+    arrays = load_map_arrays(map_data)
+    bags = solution.stack_of_bags
+    gift_ids = np.fromiter(chain.from_iterable(bags), dtype=np.int64)
+    rows = arrays.gift_rows(gift_ids)
+    if (rows < 0).any():
+        return f"Unknown gift {gift_ids[rows < 0][0]}"
+    if len(np.unique(rows)) != len(rows):
+        return "Some gifts are in the bags more than once"
+    if len(rows) != len(map_data.children):
+        return f"{len(rows)} gifts for {len(map_data.children)} children"
+    total_price = int(arrays.gift_price[rows].sum())
+    if total_price > MAX_MONEY:
+        return f"Total gifts price is {total_price}, but you have only {MAX_MONEY}!"
+
+    gift_bags = np.repeat(np.arange(len(bags)), [len(bag) for bag in bags])
+    weights = np.bincount(gift_bags, arrays.gift_weight[rows], len(bags))
+    volumes = np.bincount(gift_bags, arrays.gift_volume[rows], len(bags))
+    too_big = np.nonzero((weights > BAG_MAX_WEIGHT) | (volumes > BAG_MAX_VOLUME))[0]
+    if len(too_big):
+        return f"Bag #{too_big[0]} {bags[too_big[0]]} is too big"
+
+    # same walk as in `emulate`, with bags replaced by the numbers of gifts in them
+    start = (0, 0)
+    children = {(c.x, c.y) for c in map_data.children}
+    served = set()
+    curr_pos = start
+    bag = len(bags) - 1
+    left = len(bags[bag]) if bags else 0
+    for next_pos in solution.moves + [None]:
+        if not (0 <= curr_pos[0] <= MAX_COORD and 0 <= curr_pos[1] <= MAX_COORD):
+            return f"Position {curr_pos} is out of the map"
+        if left and curr_pos in children:
+            left -= 1
+            served.add(curr_pos)
+        if not left and curr_pos == start and bag > 0:
+            bag -= 1
+            left = len(bags[bag])
+        if next_pos is None:
+            break
+        next_pos = (next_pos.x, next_pos.y)
+        if next_pos == curr_pos:
+            return f"Move to the same position {curr_pos}"
+        curr_pos = next_pos
+
+    if left or bag > 0:
+        return f"{left + sum(map(len, bags[:bag]))} gifts are not delivered"
+    if len(served) < len(children):
+        return f"Children left without a gift: {len(children) - len(served)}"
+    return None
+
 
-    for i, bag in enumerate(solution.stack_of_bags):
-        assert is_bag_valid(
-            BagDescription.from_bag(map_data, bag)
-        ), f"Bag #{i} {bag} is too big"
+def emulate(
+    solution: Solution,
+    map_data: Map,
+    deliveries: list[tuple[int, int]] | None = None,
+    report_path: str | None = REPORT_PATH,
+) -> RoundInfoData:
+    """Time and length of the route, `deliveries` gets (child row, gift id) pairs.
+
+    The segments are streamed to the report as they are emulated, no report is
+    written if `report_path` is None.
+    """
+    error = validate(solution, map_data)
+    assert error is None, error
 
     start = Coordinates(0, 0)
-    children = set(map(Child.coords, map_data.children))
+    children = {c.coords(): i for i, c in enumerate(map_data.children)}
     bags = solution.stack_of_bags.copy()
     curr_pos = start
     curr_bag = bags.pop().copy()
 
     total_dist = 0
     total_time = 0
-    segments: list[EmulatorReportSegment] = []
     tot_snow = 0
-    for next_pos in solution.moves + [None]:
-        assert curr_pos.in_bounds(), f'{curr_pos}'
+    report_context = ReportWriter(report_path) if report_path else nullcontext()
+    with report_context as report:
+        for next_pos in solution.moves + [None]:
+            assert curr_pos.in_bounds(), f"{curr_pos}"
 
-        if curr_bag and curr_pos in children:
-            curr_bag.pop()
+            if curr_bag and curr_pos in children:
+                gift_id = curr_bag.pop()
+                if deliveries is not None:
+                    deliveries.append((children[curr_pos], gift_id))
 
-        if not curr_bag and curr_pos == start:
-            curr_bag = bags.pop().copy()
+            if not curr_bag and curr_pos == start and bags:
+                curr_bag = bags.pop().copy()
 
-        if next_pos is None:
-            break
+            if next_pos is None:
+                break
 
-        dist, snow_dist, distances_in_snow = segment_dist(
-            curr_pos, next_pos, map_data.snow_areas
-        )
-        assert dist > 0
-        total_dist += dist
-        tot_snow += snow_dist
-        total_time += segment_time(dist, snow_dist, next_pos - curr_pos)
-        segments.append(
-            EmulatorReportSegment(
-                distances_in_snow=distances_in_snow,
-                from_pos=curr_pos,
-                to_pos=next_pos,
-                distance=dist,
+            dist, snow_dist, distances_in_snow = segment_dist(
+                curr_pos, next_pos, map_data.snow_areas
             )
-        )
-        curr_pos = next_pos
-
-    assert not curr_bag
-    assert not bags
-
-    save(
-        EmulatorReport(
-            segments=segments, total_distance=total_dist, distance_in_snow=tot_snow
-        ),
-        "./data/report.json",
-    )
+            assert dist > 0
+            total_dist += dist
+            tot_snow += snow_dist
+            total_time += segment_time(dist, snow_dist, next_pos - curr_pos)
+            if report is not None:
+                report.write_segment(
+                    EmulatorReportSegment(
+                        distances_in_snow=distances_in_snow,
+                        from_pos=curr_pos,
+                        to_pos=next_pos,
+                        distance=dist,
+                    )
+                )
+            curr_pos = next_pos
+
+        assert not curr_bag
+        assert not bags
+        if report is not None:
+            report.write_totals(total_dist, tot_snow)
 
     return RoundInfoData(
         error_message="",
@@ -97,14 +193,49 @@ def emulate(solution: Solution, map_data: Map) -> RoundInfoData:
     )
 
 
+def _rejected(error_message: str) -> RoundInfoData:
+    return RoundInfoData(
+        error_message=error_message,
+        status="Checker verdict",
+        total_time=0,
+        total_length=0,
+        total_happy=None,
+    )
+
+
+def evaluate(
+    solution: Solution, map_data: Map, weights: Weights | None = None
+) -> RoundInfoData:
+    """Local stand-in for the server score: `emulate` plus estimated happiness.
+
+    Happiness uses the learned weights. Solutions the server would reject get an
+    `error_message` instead of an exception.
+    """
+    error = validate(solution, map_data)
+    if error is not None:
+        return _rejected(error)
+    if weights is None:
+        weights = load_weights()
+    arrays = load_map_arrays(map_data)
+
+    deliveries: list[tuple[int, int]] = []
+    info = emulate(solution, map_data, deliveries, report_path=None)
+    child_rows, gift_ids = np.array(deliveries, dtype=np.int64).reshape(-1, 2).T
+    info.total_happy = eval_deliveries(
+        arrays, child_rows, arrays.gift_rows(gift_ids), weights
+    )
+    return info
+
+
 if __name__ == "__main__":
     import warnings
 
     warnings.filterwarnings("ignore")
+    warm_up()
 
     sol: Solution = load(Solution, "./data/star.json")
     mp = load_map()
-    print(emulate(sol, mp))
+    print(evaluate(sol, mp))
     print(len(sol.moves))
     # visualizer.visualize_route(mp, sol).save("./data/route.png")
     if input("Send solution? y/n: ").lower() in ("y", "yes"):
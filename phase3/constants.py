@@ -9,16 +9,33 @@ MAP_ID = os.getenv("MAP_ID")
 BASE_URL = "https://datsanta.dats.team"
 SUBMISSION_URL = BASE_URL + "/api/round"
 INFO_URL_TEMPLATE = SUBMISSION_URL + "/%s"
+# simultaneous requests when polling the statuses of the rounds
+STATUS_CONCURRENCY = 8
+# seconds to wait for the status of one round
+STATUS_TIMEOUT = 30
 MAP_URL = BASE_URL + f"/json/map/{MAP_ID}.json"
 AUTH_HEADER = {"X-API-Key": API_KEY}
 
 IDS_FILE = "./data/.round_ids.json"
 CACHE_FILE = "./data/.status_cache.json"
+# one JSON line per submission made by submitter.py
+LEDGER_FILE = "./data/submissions.jsonl"
+# NDJSON report of checker.emulate
+REPORT_PATH = "./data/report.ndjson"
 MAP_FILE_PATH = "./data/map.json"
+MAP_ARRAYS_PATH = "./data/map_arrays.npz"
+MAP_CACHE_PATH = "./data/.map_cache.pickle"
+# bumped when the data classes of the map change, invalidates the cache above
+MAP_CACHE_FORMAT = 1
 SOLUTIONS_PATH = "./data/solutions/"
 
-TIMES_MATRIX_PATH = "./data/matrix.json"
+TIMES_MATRIX_PATH = "./data/matrix.npy"
+STAR_MATRIX_PATH = "./data/star_matrix.npy"
+PORTFOLIO_MATRIX_PATH = "./data/portfolio_matrix.npy"
+PORTFOLIO_RESULTS_PATH = "./data/portfolio.json"
+VRP_SOLUTION_PATH = "./data/solution_vrp.json"
 PRECALC_BASE_FILE = "./data/precalc_base.json"
+PRECALC_BASE_DB = "./data/precalc_base.sqlite3"
 
 # Game constants
 MAX_MONEY = 50000
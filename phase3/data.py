@@ -4,9 +4,8 @@ from dataclasses import dataclass
 from enum import Enum
 from math import sqrt, pi, cos, sin
 
-import numba
+import numpy as np
 from dataclass_wizard import JSONWizard, json_field
-from shapely import Point, LineString
 
 from constants import MAX_COORD
 
@@ -203,9 +202,43 @@ class Category(Enum):
     SOCCER_BALL = "soccer_ball"
 
 
-@numba.njit
-def in_circle(x, y, cx, cy, r):
-    return (x - cx) ** 2 + (y - cy) ** 2 < r**2
+@dataclass
+class SnowArrays:
+    """Snow areas as arrays of centers and radii for the batched kernels"""
+
+    x: np.ndarray
+    y: np.ndarray
+    r: np.ndarray
+
+    @classmethod
+    def from_snow_areas(cls, snow_areas: list["SnowArea"]):
+        return cls(
+            x=np.array([s.x for s in snow_areas], dtype=np.float64),
+            y=np.array([s.y for s in snow_areas], dtype=np.float64),
+            r=np.array([s.r for s in snow_areas], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_circles(cls, circles: list[Circle]):
+        return cls(
+            x=np.array([c.center.x for c in circles], dtype=np.float64),
+            y=np.array([c.center.y for c in circles], dtype=np.float64),
+            r=np.array([c.radius for c in circles], dtype=np.float64),
+        )
+
+    def segment(self, from_pos: "Coordinates", to_pos: "Coordinates") -> np.ndarray:
+        """Length of the segment inside each of the snow areas"""
+        from geometry import segment_in_circles
+
+        return segment_in_circles(
+            float(from_pos.x),
+            float(from_pos.y),
+            float(to_pos.x),
+            float(to_pos.y),
+            self.x,
+            self.y,
+            self.r,
+        )
 
 
 @dataclass
@@ -229,6 +262,8 @@ class Line:
 
     def distance_in_circle(self, circle: "Circle", use_old=False) -> float:
         if use_old:
+            from shapely import Point, LineString
+
             c = Point(circle.center.x, circle.center.y)
             c = c.buffer(circle.radius)
             l = LineString(
@@ -239,7 +274,9 @@ class Line:
             assert length != 0 or intersection.is_empty
             return length
 
-        return Line._distance_in_circle(
+        from geometry import segment_in_circle
+
+        return segment_in_circle(
             self.from_pos.x,
             self.from_pos.y,
             self.to_pos.x,
@@ -249,52 +286,6 @@ class Line:
             circle.radius,
         )
 
-    @staticmethod
-    @numba.njit
-    def _distance_in_circle(p1x, p1y, p2x, p2y, cx, cy, r):
-        p1_in, p2_in = in_circle(p1x, p1y, cx, cy, r), in_circle(p2x, p2y, cx, cy, r)
-        if p1_in and p2_in:
-            return ((p1x - p2x) ** 2 + (p1y - p2y) ** 2) ** 0.5
-
-        (x1, y1), (x2, y2) = (p1x - cx, p1y - cy), (p2x - cx, p2y - cy)
-        dx, dy = (x2 - x1), (y2 - y1)
-        dr = (dx**2 + dy**2) ** 0.5
-        big_d = x1 * y2 - x2 * y1
-        discriminant = r**2 * dr**2 - big_d**2
-
-        if discriminant <= 0:
-            return 0
-
-        intersections = [
-            (
-                cx
-                + (big_d * dy + sign * (-1 if dy < 0 else 1) * dx * discriminant**0.5)
-                / dr**2,
-                cy + (-big_d * dx + sign * abs(dy) * discriminant**0.5) / dr**2,
-            )
-            for sign in ((1, -1) if dy < 0 else (-1, 1))
-        ]  # This makes sure the order along the segment is correct
-        fraction_along_segment = [
-            (xi - p1x) / dx if abs(dx) > abs(dy) else (yi - p1y) / dy
-            for xi, yi in intersections
-        ]
-        intersections = [
-            pt
-            for pt, frac in zip(intersections, fraction_along_segment)
-            if 0 <= frac <= 1
-        ]
-
-        if p1_in:
-            intersections.append((p1x, p1y))
-        if p2_in:
-            intersections.append((p2x, p2y))
-
-        if len(intersections) < 2:
-            return 0
-
-        (x1, y1), (x2, y2) = intersections
-        return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
-
 
 @dataclass
 class EmulatorReportSegment(JSONWizard):
@@ -304,13 +295,6 @@ class EmulatorReportSegment(JSONWizard):
     distances_in_snow: list[float]
 
 
-@dataclass
-class EmulatorReport(JSONWizard):
-    total_distance: float
-    distance_in_snow: float
-    segments: list[EmulatorReportSegment]
-
-
 @dataclass
 class BagDescription:
     weight: int
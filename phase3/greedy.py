@@ -10,6 +10,7 @@ from knapsack import solve
 from random import shuffle
 
 from happiness_estimator import Weights
+from map_arrays import load_map_arrays
 
 child_cache = defaultdict(int)
 
@@ -156,9 +157,7 @@ def get_best_fit_with_weights(
 
 
 def get_sol_cost(m, ps):
-    def get_gift(gid: int):
-        for g in m.gifts:
-            if g.id == gid:
-                return g
-
-    return sum(get_gift(p.gift_id).price for p in ps)
+    arrays = load_map_arrays(m)
+    rows = arrays.gift_rows([p.gift_id for p in ps])
+    assert (rows >= 0).all(), "Unknown gift"
+    return int(arrays.gift_price[rows].sum())
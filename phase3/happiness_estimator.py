@@ -5,11 +5,13 @@ from collections import defaultdict
 from dataclass_wizard import JSONWizard
 from dataclasses import dataclass
 
+import numpy as np
 from tqdm import tqdm
 
 from constants import SOLUTIONS_PATH, CACHE_FILE, MIN_AGE, MAX_AGE
 from data import Solution, Map, Category, RoundInfo, Gender
 from util import load, load_map, save
+from map_arrays import MapArrays, CATEGORIES, GENDERS
 
 from random import randint, randrange
 
@@ -65,6 +67,18 @@ class Weights(JSONWizard):
     def get_gender(self, gender: str):
         return self.male if Gender(gender) == Gender.MALE else self.female
 
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """k and b of the functions indexed by gender, age and gift type codes"""
+        k = np.zeros((len(GENDERS), MAX_AGE + 1, len(CATEGORIES)))
+        b = np.zeros_like(k)
+        for g, gender in enumerate(GENDERS):
+            ages = self.get_gender(gender.value)
+            for age in range(MIN_AGE, MAX_AGE + 1):
+                for c, category in enumerate(CATEGORIES):
+                    k[g, age, c] = ages[age][category].k
+                    b[g, age, c] = ages[age][category].b
+        return k, b
+
 
 def eval_solution(solution: Solution, map_data: Map, weights: Weights) -> int:
     # TODO
@@ -78,6 +92,17 @@ def eval_solution(solution: Solution, map_data: Map, weights: Weights) -> int:
     return happiness
 
 
+def eval_deliveries(
+    arrays: MapArrays, child_rows: np.ndarray, gift_rows: np.ndarray, weights: Weights
+) -> int:
+    """Happiness of the children with the given rows from the gifts in the same order"""
+    k, b = weights.to_arrays()
+    genders, ages = arrays.child_gender[child_rows], arrays.child_age[child_rows]
+    types = arrays.gift_type[gift_rows]
+    prices = arrays.gift_price[gift_rows]
+    return int(np.sum(k[genders, ages, types] * prices + b[genders, ages, types]))
+
+
 SolutionData = dict[str, (Solution, int)]
 
 
@@ -104,6 +129,13 @@ def make_initial_weights() -> AgeToWeights:
     }
 
 
+def load_weights() -> Weights:
+    """Learned weights, or the initial ones if nothing is learned yet"""
+    if not os.path.exists(WEIGHTS_PATH):
+        return Weights(male=make_initial_weights(), female=make_initial_weights())
+    return load(Weights, WEIGHTS_PATH)
+
+
 # class FunctionSearcher(pyeasyga.GeneticAlgorithm):
 #     map_data = load_map()
 
@@ -1,9 +1,8 @@
-from ortools.algorithms import pywrapknapsack_solver
-
-
 def solve(
     values: list[int], weights: list[list[int]], capacities: list[int]
 ) -> list[int]:
+    from ortools.algorithms import pywrapknapsack_solver
+
     # Create the solver.
     solver = pywrapknapsack_solver.KnapsackSolver(
         pywrapknapsack_solver.KnapsackSolver.KNAPSACK_MULTIDIMENSION_BRANCH_AND_BOUND_SOLVER,
@@ -0,0 +1,140 @@
+"""Compiled 2-opt and Or-opt over the time matrix, for the order of the trips.
+
+A trip is a route from the base (node 0) to the base, or to node -1 if it does
+not return there: arcs to -1 cost nothing. The first and the last nodes stay in
+place, the children in between are reordered.
+"""
+from __future__ import annotations
+
+import numba
+import numpy as np
+
+# longest segment moved by Or-opt, segments of one node are plain relocations
+OR_OPT_MAX_LENGTH = 3
+# smaller gains are treated as rounding noise
+EPS = 1e-9
+
+
+@numba.njit(cache=True)
+def _arc(matrix, a, b):
+    if a < 0 or b < 0:
+        return 0.0
+    return matrix[a, b]
+
+
+@numba.njit(cache=True)
+def route_time(matrix, route):
+    result = 0.0
+    for t in range(1, len(route)):
+        result += _arc(matrix, route[t - 1], route[t])
+    return result
+
+
+@numba.njit(cache=True)
+def _two_opt(matrix, route):
+    """Applies the first reversal of route[i:j + 1] that makes the route faster.
+
+    The matrix is asymmetric, so the reversed part is priced with prefix sums of
+    the arcs in both directions.
+    """
+    n = len(route)
+    there = np.zeros(n)
+    back = np.zeros(n)
+    for t in range(1, n):
+        there[t] = there[t - 1] + _arc(matrix, route[t - 1], route[t])
+        back[t] = back[t - 1] + _arc(matrix, route[t], route[t - 1])
+    for i in range(1, n - 2):
+        for j in range(i + 1, n - 1):
+            old = (
+                _arc(matrix, route[i - 1], route[i])
+                + there[j]
+                - there[i]
+                + _arc(matrix, route[j], route[j + 1])
+            )
+            new = (
+                _arc(matrix, route[i - 1], route[j])
+                + back[j]
+                - back[i]
+                + _arc(matrix, route[i], route[j + 1])
+            )
+            if new < old - EPS:
+                route[i : j + 1] = route[i : j + 1][::-1].copy()
+                return True
+    return False
+
+
+@numba.njit(cache=True)
+def _move_segment(route, i, length, p):
+    """Moves route[i:i + length] in front of route[p]"""
+    segment = route[i : i + length].copy()
+    if p < i:
+        route[p + length : i + length] = route[p:i].copy()
+        route[p : p + length] = segment
+    else:
+        route[i : p - length] = route[i + length : p].copy()
+        route[p - length : p] = segment
+
+
+@numba.njit(cache=True)
+def _or_opt(matrix, route, max_length):
+    """Applies the first move of a segment elsewhere that makes the route faster"""
+    n = len(route)
+    for length in range(1, max_length + 1):
+        for i in range(1, n - length):
+            first, last = route[i], route[i + length - 1]
+            before, after = route[i - 1], route[i + length]
+            removed = (
+                _arc(matrix, before, first)
+                + _arc(matrix, last, after)
+                - _arc(matrix, before, after)
+            )
+            for p in range(1, n):
+                if i <= p <= i + length:
+                    continue
+                added = (
+                    _arc(matrix, route[p - 1], first)
+                    + _arc(matrix, last, route[p])
+                    - _arc(matrix, route[p - 1], route[p])
+                )
+                if added < removed - EPS:
+                    _move_segment(route, i, length, p)
+                    return True
+    return False
+
+
+@numba.njit(cache=True)
+def improve_route(matrix, route, max_length=OR_OPT_MAX_LENGTH):
+    """2-opt and Or-opt until neither of them finds a faster route, in place"""
+    while _two_opt(matrix, route) or _or_opt(matrix, route, max_length):
+        pass
+    return route
+
+
+def _trip_routes(trips: list[list[int]], open_last: bool) -> list[np.ndarray]:
+    routes = []
+    for k, trip in enumerate(trips):
+        end = -1 if open_last and k == len(trips) - 1 else 0
+        routes.append(np.array([0, *trip, end], dtype=np.int64))
+    return routes
+
+
+def trips_time(
+    matrix: np.ndarray, trips: list[list[int]], open_last: bool = False
+) -> float:
+    """Total time of the trips, given and priced like in `improve_trips`"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return sum(route_time(matrix, route) for route in _trip_routes(trips, open_last))
+
+
+def improve_trips(
+    matrix: np.ndarray, trips: list[list[int]], open_last: bool = False
+) -> list[list[int]]:
+    """Faster order of the nodes of every trip, trips are given without the base.
+
+    With `open_last` the last trip does not have to return to the base.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return [
+        improve_route(matrix, route)[1:-1].tolist()
+        for route in _trip_routes(trips, open_last)
+    ]
@@ -0,0 +1,113 @@
+"""Columnar view of the map for vectorized code"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from constants import MAP_ARRAYS_PATH
+from data import Map, Category, Gender
+from util import get_map_hash, load_map, loaded_map_hash
+
+# codes of gift types and child genders are indices in these lists
+CATEGORIES: list[Category] = list(Category)
+GENDERS: list[Gender] = list(Gender)
+
+
+@dataclass
+class MapArrays:
+    """Gifts sorted by id, children and snow areas in the order of the map"""
+
+    gift_id: np.ndarray
+    gift_price: np.ndarray
+    gift_weight: np.ndarray
+    gift_volume: np.ndarray
+    gift_type: np.ndarray
+    child_x: np.ndarray
+    child_y: np.ndarray
+    child_age: np.ndarray
+    child_gender: np.ndarray
+    snow_x: np.ndarray
+    snow_y: np.ndarray
+    snow_r: np.ndarray
+    # row of the gift with the given id, -1 for unknown ids
+    gift_row_by_id: np.ndarray
+
+    @classmethod
+    def from_map(cls, m: Map) -> "MapArrays":
+        gifts = sorted(m.gifts, key=lambda g: g.id)
+        gift_id = np.array([g.id for g in gifts], dtype=np.int64)
+        gift_row_by_id = np.full(gift_id.max(initial=0) + 1, -1, dtype=np.int64)
+        gift_row_by_id[gift_id] = np.arange(len(gift_id))
+        category_codes = {c.value: i for i, c in enumerate(CATEGORIES)}
+        gender_codes = {g.value: i for i, g in enumerate(GENDERS)}
+        return cls(
+            gift_id=gift_id,
+            gift_price=np.array([g.price for g in gifts], dtype=np.int64),
+            gift_weight=np.array([g.weight for g in gifts], dtype=np.int64),
+            gift_volume=np.array([g.volume for g in gifts], dtype=np.int64),
+            gift_type=np.array([category_codes[g.type] for g in gifts], dtype=np.int8),
+            child_x=np.array([c.x for c in m.children], dtype=np.int64),
+            child_y=np.array([c.y for c in m.children], dtype=np.int64),
+            child_age=np.array([c.age for c in m.children], dtype=np.int8),
+            child_gender=np.array(
+                [gender_codes[c.gender] for c in m.children], dtype=np.int8
+            ),
+            snow_x=np.array([s.x for s in m.snow_areas], dtype=np.float64),
+            snow_y=np.array([s.y for s in m.snow_areas], dtype=np.float64),
+            snow_r=np.array([s.r for s in m.snow_areas], dtype=np.float64),
+            gift_row_by_id=gift_row_by_id,
+        )
+
+    def gift_rows(self, gift_ids) -> np.ndarray:
+        """Rows of the gifts with the given ids, -1 for unknown ids"""
+        gift_ids = np.asarray(gift_ids, dtype=np.int64)
+        known = (gift_ids >= 0) & (gift_ids < len(self.gift_row_by_id))
+        return np.where(known, self.gift_row_by_id[np.where(known, gift_ids, 0)], -1)
+
+    def save(self, path: str, map_hash: str) -> None:
+        arrays = {f.name: getattr(self, f.name) for f in fields(self)}
+        np.savez(path, map_hash=np.array(map_hash), **arrays)
+
+    @classmethod
+    def load(cls, path: str, map_hash: str) -> "MapArrays | None":
+        """None if the file is missing or is made for another map"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as stored:
+            if str(stored["map_hash"]) != map_hash:
+                return None
+            return cls(**{f.name: stored[f.name] for f in fields(cls)})
+
+
+_loaded: tuple[Map, MapArrays] | None = None
+
+
+def load_map_arrays(m: Map | None = None) -> MapArrays:
+    """Columnar view of the map.
+
+    Without `m`, or with the map `load_map` returned, it is the map file, cached
+    on disk next to it, so the map is converted only if the cache is missing or
+    stale. Any other map is converted itself. The arrays of the last passed map
+    are kept in memory, so repeated calls with it are free.
+    """
+    global _loaded
+    if m is None:
+        map_hash = get_map_hash()
+        arrays = MapArrays.load(MAP_ARRAYS_PATH, map_hash)
+        if arrays is None:
+            arrays = MapArrays.from_map(load_map())
+            arrays.save(MAP_ARRAYS_PATH, map_hash)
+        return arrays
+    if _loaded is None or _loaded[0] is not m:
+        map_hash = loaded_map_hash(m)
+        arrays = None
+        if map_hash is not None:
+            arrays = MapArrays.load(MAP_ARRAYS_PATH, map_hash)
+        if arrays is None:
+            arrays = MapArrays.from_map(m)
+            if map_hash is not None:
+                arrays.save(MAP_ARRAYS_PATH, map_hash)
+        _loaded = m, arrays
+    return _loaded[1]
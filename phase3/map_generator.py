@@ -0,0 +1,99 @@
+"""Random maps in the format of data/map.json for scaling experiments"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from constants import MAX_COORD, MIN_AGE, MAX_AGE
+from data import Map, Gift, Child, SnowArea, Category, Gender
+from util import save
+
+# ranges of the values in the real phase3 map
+PRICE_RANGE = (5, 200)
+WEIGHT_RANGE = (4, 12)
+VOLUME_RANGE = (2, 7)
+RADIUS_MEAN = 575
+RADIUS_STD = 150
+MIN_RADIUS = 50
+
+
+def generate_map(
+    children: int = 1000,
+    snow_areas: int = 30,
+    gifts: int = 10000,
+    radius_mean: float = RADIUS_MEAN,
+    radius_std: float = RADIUS_STD,
+    seed: int | None = None,
+) -> Map:
+    """Random map of the given size, reproducible with the same seed.
+
+    Children are at distinct points, snow radii are normally distributed, gift
+    types, prices and sizes are uniform in the ranges of the real map.
+    """
+    assert children < (MAX_COORD + 1) ** 2, "Too many children for the map"
+    rng = np.random.default_rng(seed)
+
+    # distinct points in the order of generation, none at the base
+    points: dict[tuple[int, int], None] = {}
+    while len(points) < children:
+        batch = rng.integers(0, MAX_COORD + 1, size=(children - len(points), 2))
+        for x, y in batch:
+            if x or y:
+                points[int(x), int(y)] = None
+    children_list = [
+        Child(
+            gender=rng.choice(list(Gender)).value,
+            age=int(rng.integers(MIN_AGE, MAX_AGE + 1)),
+            x=x,
+            y=y,
+        )
+        for x, y in points
+    ]
+
+    radii = np.maximum(rng.normal(radius_mean, radius_std, snow_areas), MIN_RADIUS)
+    centers = rng.integers(0, MAX_COORD + 1, size=(snow_areas, 2))
+    snow_list = [
+        SnowArea(r=int(r), x=int(x), y=int(y)) for r, (x, y) in zip(radii, centers)
+    ]
+
+    categories = list(Category)
+    gift_list = [
+        Gift(
+            id=i + 1,
+            type=categories[int(rng.integers(len(categories)))].value,
+            price=int(rng.integers(PRICE_RANGE[0], PRICE_RANGE[1] + 1)),
+            weight=int(rng.integers(WEIGHT_RANGE[0], WEIGHT_RANGE[1] + 1)),
+            volume=int(rng.integers(VOLUME_RANGE[0], VOLUME_RANGE[1] + 1)),
+        )
+        for i in range(gifts)
+    ]
+    return Map(gifts=gift_list, children=children_list, snow_areas=snow_list)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", help="path of the JSON file with the map")
+    parser.add_argument("-c", "--children", type=int, default=1000)
+    parser.add_argument("-s", "--snow-areas", type=int, default=30)
+    parser.add_argument("-g", "--gifts", type=int, default=10000)
+    parser.add_argument("--radius-mean", type=float, default=RADIUS_MEAN)
+    parser.add_argument("--radius-std", type=float, default=RADIUS_STD)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    save(
+        generate_map(
+            args.children,
+            args.snow_areas,
+            args.gifts,
+            args.radius_mean,
+            args.radius_std,
+            args.seed,
+        ),
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
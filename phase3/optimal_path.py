@@ -1,42 +1,161 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from math import exp, inf, log
+import random
+import time
 from random import gauss, uniform
 import warnings
-from data import Circle, Coordinates, Line, Path, Route
+from data import Circle, Coordinates, Path, Route, SnowArrays
+from snow_index import SnowIndex
 from simanneal import Annealer
 from util import segment_time
 
-from util import load_map
-
-from visualizer import visualize_route
+from util import load_map, warm_up
 
 
 @dataclass
 class SnowDistEstimator:
     circles: list[Circle]
+    index: SnowIndex = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.index = SnowIndex.from_snow(SnowArrays.from_circles(self.circles))
 
     def snow_dist(self, f: Coordinates, t: Coordinates) -> float:
         # context unaware
-        l = Line.from_two_points(f, t)
-        return sum(l.distance_in_circle(s) for s in self.circles)
+        return float(self.index.segment(f, t).sum())
+
+
+@dataclass
+class CostedPath(Path):
+    """Path with the cost of every segment to reevaluate only the moved ones"""
+
+    costs: list[float] = field(default_factory=list)
+
+    def copy(self) -> "CostedPath":
+        # mutators never change coordinates in place, so a shallow copy is enough
+        return CostedPath(self.path.copy(), self.length, self.costs.copy())
 
 
 @dataclass
 class ObjectiveChecker:
     snow_dist_estimator: callable
 
+    def segment_cost(self, prev: Coordinates, pos: Coordinates) -> float:
+        return segment_time(
+            prev.dist(pos),
+            self.snow_dist_estimator(pos, prev),
+            direction=pos - prev,
+        )
+
     def objective(self, path: list[Coordinates]):
         # context unaware
+        return self.bounded_objective(path, inf)
+
+    def bounded_objective(self, path: list[Coordinates], bound: float) -> float | None:
+        """Same as `objective`, but None as soon as the cost exceeds the bound"""
         res = 0
         prev = path[0]
         for pos in path[1:]:
-            res += segment_time(
-                prev.dist(pos),
-                self.snow_dist_estimator(pos, prev),
-                direction=pos - prev,
-            )
+            res += self.segment_cost(prev, pos)
+            if res > bound:
+                return None
             prev = pos
         return res
 
+    def segment_costs(
+        self, path: list[Coordinates], old: CostedPath | None = None, bound=inf
+    ) -> list[float] | None:
+        """Costs of the path segments, the ones of `old` are reused where it matches.
+
+        None if the total cost exceeds the bound.
+        """
+        if old is None or len(old.costs) != len(path) - 1:
+            old = CostedPath(path, inf, [None] * (len(path) - 1))
+        res = 0
+        costs = []
+        for a, b, old_a, old_b, cost in zip(
+            path, path[1:], old.path, old.path[1:], old.costs
+        ):
+            if cost is None or a != old_a or b != old_b:
+                cost = self.segment_cost(a, b)
+            res += cost
+            if res > bound:
+                return None
+            costs.append(cost)
+        return costs
+
+
+# a move whose cost is bigger than the current one by this number of temperatures
+# is accepted with probability below exp(-REJECTION_TEMPERATURES), so there is
+# no need to evaluate it completely
+REJECTION_TEMPERATURES = 10
+
+
+class BoundedAnnealer(Annealer):
+    """Annealer that knows the cost above which a move is rejected anyway.
+
+    `anneal` is the one of simanneal, but it keeps the temperature of the current
+    step in `self.T` (simanneal has it only in a local variable), so the bound
+    always follows the schedule actually used.
+    """
+
+    T = inf
+
+    def rejection_bound(self) -> float:
+        return self.energy() + REJECTION_TEMPERATURES * self.T
+
+    def anneal(self):
+        step = 0
+        self.start = time.time()
+        if self.Tmin <= 0.0:
+            raise Exception("Exponential cooling requires a minimum temperature > 0")
+        t_factor = -log(self.Tmax / self.Tmin)
+
+        self.T = self.Tmax
+        E = self.energy()
+        prev_state = self.copy_state(self.state)
+        prev_energy = E
+        self.best_state = self.copy_state(self.state)
+        self.best_energy = E
+        trials, accepts, improves = 0, 0, 0
+        if self.updates > 0:
+            update_wavelength = self.steps / self.updates
+            self.update(step, self.T, E, None, None)
+
+        while step < self.steps and not self.user_exit:
+            step += 1
+            self.T = self.Tmax * exp(t_factor * step / self.steps)
+            dE = self.move()
+            if dE is None:
+                E = self.energy()
+                dE = E - prev_energy
+            else:
+                E += dE
+            trials += 1
+            if dE > 0.0 and exp(-dE / self.T) < random.random():
+                self.state = self.copy_state(prev_state)
+                E = prev_energy
+            else:
+                accepts += 1
+                if dE < 0.0:
+                    improves += 1
+                prev_state = self.copy_state(self.state)
+                prev_energy = E
+                if E < self.best_energy:
+                    self.best_state = self.copy_state(self.state)
+                    self.best_energy = E
+            if self.updates > 1:
+                if (step // update_wavelength) > ((step - 1) // update_wavelength):
+                    self.update(step, self.T, E, accepts / trials, improves / trials)
+                    trials, accepts, improves = 0, 0, 0
+
+        self.state = self.copy_state(self.best_state)
+        if self.save_state_on_exit:
+            self.save_state()
+        return self.best_state, self.best_energy
+
 
 # NOTE: after application of such a objective checker, the generated path may contain repeated points!
 # because this function does not throw on same points, but just puts an big cost for them,
@@ -107,12 +226,38 @@ def absolute_rand_path(segmentation, *_):
     return res
 
 
+def state_factory(
+    objective: callable,
+    segment_costs: callable | None = None,
+    bounded_objective: callable | None = None,
+) -> callable:
+    """Makes annealer states with the most efficient of the given objectives.
+
+    States exceeding the bound get an infinite length.
+    """
+
+    def make_state(path: list[Coordinates], old: Path | None = None, bound=inf):
+        if segment_costs is not None:
+            costs = segment_costs(path, old, bound)
+            if costs is None:
+                return CostedPath(path, inf, [])
+            return CostedPath(path, sum(costs), costs)
+        if bounded_objective is not None:
+            length = bounded_objective(path, bound)
+            return Path(path, inf if length is None else length)
+        return Path(path, objective(path))
+
+    return make_state
+
+
 # a generalization of just a base path finder
 class OptimalPathFinder:
     segmentation: int
     mutate: callable  # context aware
     objective: callable  # context unaware
     rand_path_generator: callable  # context aware
+    segment_costs: callable | None  # like ObjectiveChecker.segment_costs
+    bounded_objective: callable | None  # like ObjectiveChecker.bounded_objective
     schedule: dict = {"tmax": 100.0, "tmin": 1, "steps": 340, "updates": 100}
 
     def __init__(
@@ -122,10 +267,14 @@ class OptimalPathFinder:
         objective,
         rand_path_generator=None,
         schedule=None,
+        segment_costs=None,
+        bounded_objective=None,
     ):
         self.segmentation = segmentation
         self.mutate = mutate
         self.objective = objective
+        self.segment_costs = segment_costs
+        self.bounded_objective = bounded_objective
         if rand_path_generator is None:
             self.rand_path_generator = absolute_rand_path
         else:
@@ -143,18 +292,21 @@ class OptimalPathFinder:
 
         cos_a = f.x / l
         sin_a = f.y / l
+        segment_costs = self.segment_costs
+        make_state = state_factory(objective, segment_costs, self.bounded_objective)
+
+        class PathAnnealer(BoundedAnnealer):
+            copy_strategy = "deepcopy" if segment_costs is None else "method"
 
-        class PathAnnealer(Annealer):
             def move(self):
                 path = [f] + mutate(self.state.path[1:-1], cos_a, sin_a, l) + [t]
-                length = objective(path)
-                self.state = Path(path, length)
+                self.state = make_state(path, self.state, self.rejection_bound())
 
             def energy(self):
                 return self.state.length
 
         init = [f] + self.rand_path_generator(self.segmentation, cos_a, sin_a, l) + [t]
-        annealer = PathAnnealer(Path(init, objective(init)))
+        annealer = PathAnnealer(make_state(init))
         annealer.set_schedule(self.schedule)
         best, cost = annealer.anneal()
         linear = Path([f, t], objective([f, t]))
@@ -166,6 +318,7 @@ class OptimalPathFinder:
 
 def main():
     warnings.filterwarnings("ignore")
+    warm_up()
     a = Coordinates.from_str(input("Enter a: "))
     b = Coordinates.from_str(input("Enter b: "))
     sengemtation = int(input("Enter number of segments: "))
@@ -187,6 +340,8 @@ def main():
 
     print()
     if input("draw? (y/n): ") == "y":
+        from visualizer import visualize_route
+
         visualize_route(sus_map, Route(best.path, None, None)).save("data/path.png")
 
 
@@ -2,12 +2,11 @@ import json
 import os
 import warnings
 
-from constants import MAP_FILE_PATH, MAP_ID, IDS_FILE, SOLUTIONS_PATH, PRECALC_BASE_FILE
+from constants import MAP_FILE_PATH, MAP_ID, IDS_FILE, SOLUTIONS_PATH
 from checker import emulate
-from data import Solution, Map, Present, Gift, Coordinates, Child, Path
+from data import Solution, Map, Present, Gift, Coordinates
 from greedy import most_expensive, get_sol_cost
 from bin_packing import solve_bin_pack
-from visualizer import visualize_moves
 from util import (
     get_map,
     save_map,
@@ -18,9 +17,10 @@ from util import (
     edit_json_file,
     save,
     load,
-    path_len,
-    read_json_file,
+    warm_up,
 )
+from local_search import improve_trips
+from precalc_store import PrecalcStore
 
 from dataclasses import dataclass
 from dataclass_wizard import JSONWizard
@@ -41,6 +41,7 @@ def get_presents(force=False) -> list[Present]:
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore")
+    warm_up()
     if not os.path.exists(MAP_FILE_PATH):
         sus_map: Map = get_map()
         save_map(sus_map)
@@ -56,51 +57,55 @@ if __name__ == "__main__":
     presents = get_presents()
     print("Cost:", get_sol_cost(sus_map, presents))
     packed = solve_bin_pack([sus_map.gifts[p.gift_id - 1] for p in presents])
-    gift_to_children: dict[int, Child] = {
-        p.gift_id: sus_map.children[p.child_id] for p in presents
-    }
     bags = [p["gift_ids"] for p in packed]
     assert sorted(sum(bags, [])) == sorted([p.gift_id for p in presents])
 
     base_paths = {}
-    with read_json_file(PRECALC_BASE_FILE) as precalc:
+    with PrecalcStore() as precalc:
         for k, v in precalc.items():
-            base_paths[Coordinates.from_str(k)] = Path.from_dict(v)
+            base_paths[Coordinates.from_str(k)] = v
+
+    from vrp import make_distance_matrix, update_matrix
+
+    # node 0 is the base, node i is the child i - 1, times from and to the base
+    # are the ones of the paths from it
+    vertices = [Coordinates(0, 0)] + [c.coords() for c in sus_map.children]
+    matrix = update_matrix(
+        make_distance_matrix(vertices, sus_map.snow_areas),
+        vertices,
+        sus_map.snow_areas,
+    )
+    node_of_gift = {p.gift_id: p.child_id + 1 for p in presents}
+    gift_of_node = {node: gid for gid, node in node_of_gift.items()}
+
+    # nearest neighbour in every bag, then 2-opt and Or-opt
+    trips: list[list[int]] = []
+    for b in bags:
+        current_node = 0
+        nodes = {node_of_gift[gid] for gid in b}
+        trip = []
+        while nodes:
+            current_node = min(nodes, key=lambda node: matrix[current_node, node])
+            trip.append(current_node)
+            nodes.remove(current_node)
+        trips.append(trip)
+    trips = improve_trips(matrix, trips, open_last=True)
 
     moves: list[Coordinates] = []
-    current_pos = Coordinates(0, 0)
-    actual_bags = []
-    for i, b in enumerate(bags):
-        bag = []
-        child_coords = {(gid, gift_to_children[gid].coords()) for gid in b}
-        for _ in range(len(b)):
-            nearest_child = None
-            min_time = 0
-            min_gid = 0
-            for gid, c in child_coords:
-                time = path_len([current_pos, c], snow_areas=sus_map.snow_areas)
-                if nearest_child is None or time < min_time:
-                    nearest_child = c
-                    min_time = time
-                    min_gid = gid
-            if current_pos == Coordinates(0, 0):
-                # go to the first child using segmented path
-                moves.extend(base_paths[nearest_child].path[1:-1])
-            bag.append(min_gid)
-            moves.append(nearest_child)
-            current_pos = nearest_child
-            child_coords.remove((min_gid, nearest_child))
-        actual_bags.append(bag[::-1])
-        
-        # go back using segmented path
-        if i != len(bags) - 1:
-            moves.extend(reversed(base_paths[current_pos].path[1:-1]))
+    for i, trip in enumerate(trips):
+        # go to the first child and back from the last one using segmented paths
+        moves.extend(base_paths[vertices[trip[0]]].path[1:-1])
+        moves.extend(vertices[node] for node in trip)
+        if i != len(trips) - 1:
+            moves.extend(reversed(base_paths[vertices[trip[-1]]].path[1:-1]))
             moves.append(Coordinates(0, 0))
-            curr_pos = Coordinates(0, 0)
+    actual_bags = [[gift_of_node[node] for node in trip][::-1] for trip in trips]
 
     sus_solution = Solution(map_id=MAP_ID, moves=moves, stack_of_bags=actual_bags[::-1])
     print(emulate(sus_solution, sus_map))
 
+    from visualizer import visualize_moves
+
     image_path = "./data/route.png"
     visualize_moves(sus_map, sus_solution.moves).save(image_path)
     print(f"Saved at {image_path}...")
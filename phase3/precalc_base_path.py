@@ -1,15 +1,23 @@
+from __future__ import annotations
+
 import argparse
 from dataclasses import dataclass
 import json
-from random import gauss, uniform
+import os
+import random
+from multiprocessing import Pool
+from random import gauss, sample, uniform
 from data import Circle, Coordinates, Line, Path, Route
-from util import edit_json_file, load_map, read_json_file
-from simanneal import Annealer
-from constants import PRECALC_BASE_FILE
-
-from visualizer import visualize_route
+from util import load_map, warm_up
+from precalc_store import PrecalcStore
 from tqdm import tqdm
-from optimal_path import WidePathMutator, ObjectiveChecker, SnowDistEstimator
+from optimal_path import (
+    WidePathMutator,
+    ObjectiveChecker,
+    SnowDistEstimator,
+    BoundedAnnealer,
+    state_factory,
+)
 
 import warnings
 
@@ -58,6 +66,8 @@ def straight_path_from_base(segmentation, cos_a, sin_a, l):
 class PathFromBaseMutator:
     x_var: int
     y_var: int
+    # number of randomly chosen points to move, all of them if None
+    points: int | None = None
 
     def mutate(self, path: list[Coordinates], cos_a, sin_a, l) -> list[Coordinates]:
         # context aware
@@ -66,7 +76,16 @@ class PathFromBaseMutator:
         rpath = [Coordinates(10, 0)]
         rpath.extend(retranslate(pos, cos_a, sin_a) for pos in path)
         rpath.append(Coordinates(l - 10, 0))
+        moved = (
+            range(len(path))
+            if self.points is None or self.points >= len(path)
+            else set(sample(range(len(path)), self.points))
+        )
         for i, p in enumerate(rpath[1:-1]):
+            if i not in moved:
+                # keep the original point, so the costs of its segments are reused
+                mutant[i] = path[i]
+                continue
             x_max = rpath[i + 2].x - 1
             x_min = rpath[i].x + 1
             if x_max > x_min:
@@ -85,6 +104,8 @@ class OprimalPathFromBaseFinder:
     mutate: callable  # context aware
     objective: callable  # context unaware
     rand_path_from_base: callable  # context aware
+    segment_costs: callable | None  # like ObjectiveChecker.segment_costs
+    bounded_objective: callable | None  # like ObjectiveChecker.bounded_objective
     schedule: dict = {"tmax": 100.0, "tmin": 1, "steps": 340, "updates": 100}
 
     def __init__(
@@ -94,10 +115,14 @@ class OprimalPathFromBaseFinder:
         objective,
         rand_path_from_base_generator=None,
         schedule=None,
+        segment_costs=None,
+        bounded_objective=None,
     ):
         self.segmentation = segmentation
         self.mutate = mutate
         self.objective = objective
+        self.segment_costs = segment_costs
+        self.bounded_objective = bounded_objective
         if rand_path_from_base_generator is None:
             self.rand_path_from_base = rand_path_from_base
         else:
@@ -115,12 +140,15 @@ class OprimalPathFromBaseFinder:
 
         cos_a = f.x / l
         sin_a = f.y / l
+        segment_costs = self.segment_costs
+        make_state = state_factory(objective, segment_costs, self.bounded_objective)
+
+        class PathAnnealer(BoundedAnnealer):
+            copy_strategy = "deepcopy" if segment_costs is None else "method"
 
-        class PathAnnealer(Annealer):
             def move(self):
                 path = [base] + mutate(self.state.path[1:-1], cos_a, sin_a, l) + [f]
-                length = objective(path)
-                self.state = Path(path, length)
+                self.state = make_state(path, self.state, self.rejection_bound())
 
             def energy(self):
                 return self.state.length
@@ -128,7 +156,7 @@ class OprimalPathFromBaseFinder:
         init = (
             [base] + self.rand_path_from_base(self.segmentation, cos_a, sin_a, l) + [f]
         )
-        annealer = PathAnnealer(Path(init, objective(init)))
+        annealer = PathAnnealer(make_state(init))
         annealer.set_schedule(self.schedule)
         best, cost = annealer.anneal()
         linear = Path([base, f], objective([base, f]))
@@ -138,79 +166,114 @@ class OprimalPathFromBaseFinder:
         return Path([Coordinates(int(c.x), int(c.y)) for c in best.path], cost)
 
 
+def make_objective_checker(sus_map) -> ObjectiveChecker:
+    circles = [Circle.from_snow(s) for s in sus_map.snow_areas]
+    snow_dist_calculator = SnowDistEstimator(circles).snow_dist
+    return ObjectiveChecker(snow_dist_calculator)
+
+
+# points moved by every step, the costs of the other segments are reused
+MOVED_POINTS = 1
+ANNEAL_STEPS = 1000
+
+
+def find_optimal_path(f: Coordinates, checker: ObjectiveChecker, silent=False) -> Path:
+    segmentation = int(f.dist(base) // 2000)
+    return OprimalPathFromBaseFinder(
+        segmentation,
+        PathFromBaseMutator(2000, 2000, points=MOVED_POINTS).mutate,
+        # WidePathMutator(1, 3000, 3000).mutate,
+        checker.objective,
+        schedule={
+            "tmax": 100,
+            "tmin": 1,
+            "steps": ANNEAL_STEPS,
+            "updates": 500 if not silent else 0,
+        },
+        segment_costs=checker.segment_costs,
+        bounded_objective=checker.bounded_objective,
+    ).optimal_path(f)
+
+
+_worker_checker = None
+
+
+def _init_worker():
+    global _worker_checker
+    warnings.filterwarnings("ignore")
+    # forked workers share the parent's random state
+    random.seed()
+    warm_up()
+    _worker_checker = make_objective_checker(load_map())
+
+
+def _worker_optimal_path(p: str) -> tuple[str, Path]:
+    return p, find_optimal_path(Coordinates.from_str(p), _worker_checker, True)
+
+
+def precalc_points(
+    points: list[str], precalc: PrecalcStore, jobs: int
+) -> tuple[int, int]:
+    """Anneals paths to the points in a process pool, keeps only the better ones.
+
+    Returns the numbers of improved and created paths.
+    """
+    improved = 0
+    created = 0
+    with Pool(jobs, initializer=_init_worker) as pool:
+        results = pool.imap_unordered(_worker_optimal_path, points)
+        for p, best in tqdm(results, total=len(points)):
+            stored = precalc.put_if_better(p, best)
+            if stored == "improved":
+                improved += 1
+            elif stored == "created":
+                created += 1
+    return improved, created
+
+
 def main():
     warnings.filterwarnings("ignore")
+    warm_up()
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", "--point", type=Coordinates.from_str)
     parser.add_argument("-i", "--index", type=int)
     parser.add_argument("-b", "--bunch", action="store_true")
     parser.add_argument("-a", "--all_children", action="store_true")
     parser.add_argument("-v", "--visualize", action="store_true")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "-e", "--export", action="store_true", help="dump the store to JSON"
+    )
     args = parser.parse_args()
 
-    sus_map = load_map()
-
-    circles = [Circle.from_snow(s) for s in sus_map.snow_areas]
-    snow_dist_calculator = SnowDistEstimator(circles).snow_dist
-    objective = ObjectiveChecker(snow_dist_calculator).objective
+    if args.export:
+        with PrecalcStore() as precalc:
+            precalc.export_json()
+        return
 
-    silent = False
+    sus_map = load_map()
+    checker = make_objective_checker(sus_map)
+    objective = checker.objective
 
     def optimal_path(f: Coordinates) -> Path:
-        segmentation = int(f.dist(base) // 2000)
-        return OprimalPathFromBaseFinder(
-            segmentation,
-            PathFromBaseMutator(2000, 2000).mutate,
-            # WidePathMutator(1, 3000, 3000).mutate,
-            objective,
-            schedule={
-                "tmax": 100,
-                "tmin": 1,
-                "steps": 500,
-                "updates": 500 if not silent else 0,
-            },
-        ).optimal_path(f)
+        return find_optimal_path(f, checker)
 
     if args.all_children:
-        silent = True
+        points = [c.coords().to_str() for c in sus_map.children]
         for i in range(int(input("Cycles: "))):
             print(f"cycle {i}")
-            improved = 0
-            created = 0
-            with edit_json_file(PRECALC_BASE_FILE) as precalc:
-                for p in tqdm(sus_map.children):
-                    p = p.coords()
-                    best = optimal_path(p)
-                    p = p.to_str()
-                    if (
-                        p not in precalc
-                        or Path.from_dict(precalc[p]).length > best.length
-                    ):
-                        if p in precalc:
-                            improved += 1
-                        else:
-                            created += 1
-                        precalc[p] = best.to_dict()
+            with PrecalcStore() as precalc:
+                improved, created = precalc_points(points, precalc, args.jobs)
             print(
                 f"improved: {improved}/{len(sus_map.children)}, created: {created}/{len(sus_map.children)}"
             )
         return
 
     if args.bunch:
-        improved = 0
-        created = 0
-        silent = True
         print("enter points: ")
         points = json.loads(input())
-        with edit_json_file(PRECALC_BASE_FILE) as precalc:
-            for p in tqdm(points):
-                best = optimal_path(Coordinates.from_str(p))
-                if p not in precalc or Path.from_dict(precalc[p]).length > best.length:
-                    if p in precalc:
-                        improved += 1
-                    else:
-                        created += 1
-                    precalc[p] = best.to_dict()
+        with PrecalcStore() as precalc:
+            improved, created = precalc_points(points, precalc, args.jobs)
         print(f"improved: {improved}/{len(points)}, created: {created}/{len(points)}")
         return
 
@@ -219,36 +282,37 @@ def main():
 
     k = args.point.to_str()
     if args.visualize:
-        with read_json_file(PRECALC_BASE_FILE) as res:
-            if k not in res:
+        with PrecalcStore() as res:
+            path = res.get(k)
+            if path is None:
                 print("No such point")
             else:
-                path = Path.from_dict(res[k])
                 print(
                     "objective:",
                     path.length,
                 )
                 print("path:", path.path[1:-1])
                 if input("draw? (y/n): ") == "y":
+                    from visualizer import visualize_route
+
                     visualize_route(sus_map, Route(path.path, None, None)).save(
                         "data/path.png"
                     )
     else:
         print("linear: ", objective([base, args.point]))
-        with read_json_file(PRECALC_BASE_FILE) as res:
+        with PrecalcStore() as res:
             if k not in res:
                 print("no previous results")
             else:
-                print("best: ", Path.from_dict(res[k]).length)
+                print("best: ", res.length(k))
 
-        best_path = optimal_path(args.point)
-
-        with edit_json_file(PRECALC_BASE_FILE) as res:
-            if k not in res or Path.from_dict(res[k]).length > best_path.length:
-                res[k] = best_path.to_dict()
+            best_path = optimal_path(args.point)
+            res.put_if_better(k, best_path)
 
         print()
         if input("draw? (y/n): ") == "y":
+            from visualizer import visualize_route
+
             visualize_route(sus_map, Route(best_path.path, None, None)).save(
                 "data/path.png"
             )
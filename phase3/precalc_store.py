@@ -0,0 +1,129 @@
+"""Crash-safe key/value store of the precalculated paths from the base"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from typing import Iterator
+
+from constants import PRECALC_BASE_DB, PRECALC_BASE_FILE
+from data import Path
+from util import dump_json_atomic, file_hash
+
+
+class PrecalcStore:
+    """Paths from the base keyed by `Coordinates.to_str()` of the child.
+
+    Every `put_if_better` is a separate transaction, so an interrupted run keeps
+    everything stored before the interruption. On creation the paths of the JSON
+    file with precalculated paths are merged in, keeping the shorter ones, if the
+    file changed since the last merge (or export).
+    """
+
+    def __init__(
+        self, path: str = PRECALC_BASE_DB, json_path: str = PRECALC_BASE_FILE
+    ):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS paths ("
+                "point TEXT PRIMARY KEY, length REAL NOT NULL, path TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+        if os.path.exists(json_path):
+            json_hash = file_hash(json_path)
+            if json_hash != self._meta("json_hash"):
+                with open(json_path, "r") as inp:
+                    self.import_dict(json.load(inp))
+                self._set_meta("json_hash", json_hash)
+
+    def _meta(self, key: str) -> str | None:
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def __enter__(self) -> "PrecalcStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM paths").fetchone()[0]
+
+    def __contains__(self, point: str) -> bool:
+        return self.length(point) is not None
+
+    def length(self, point: str) -> float | None:
+        row = self.connection.execute(
+            "SELECT length FROM paths WHERE point = ?", (point,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, point: str) -> Path | None:
+        row = self.connection.execute(
+            "SELECT path FROM paths WHERE point = ?", (point,)
+        ).fetchone()
+        return Path.from_dict(json.loads(row[0])) if row else None
+
+    def __getitem__(self, point: str) -> Path:
+        path = self.get(point)
+        if path is None:
+            raise KeyError(point)
+        return path
+
+    def items(self) -> Iterator[tuple[str, Path]]:
+        for point, path in self.connection.execute("SELECT point, path FROM paths"):
+            yield point, Path.from_dict(json.loads(path))
+
+    def put_if_better(self, point: str, path: Path) -> str | None:
+        """Stores the path if it is new or shorter than the stored one.
+
+        Returns "created" or "improved" if the path was stored, None otherwise.
+        """
+        with self.connection:
+            old_length = self.length(point)
+            if old_length is not None and old_length <= path.length:
+                return None
+            self.connection.execute(
+                "INSERT OR REPLACE INTO paths (point, length, path) VALUES (?, ?, ?)",
+                (point, path.length, json.dumps(path.to_dict())),
+            )
+        return "created" if old_length is None else "improved"
+
+    def import_dict(self, precalc: dict[str, dict]) -> None:
+        """Stores the paths that are new or shorter than the stored ones"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO paths (point, length, path) VALUES (?, ?, ?) "
+                "ON CONFLICT (point) DO UPDATE "
+                "SET length = excluded.length, path = excluded.path "
+                "WHERE excluded.length < paths.length",
+                (
+                    (point, path["length"], json.dumps(path))
+                    for point, path in precalc.items()
+                ),
+            )
+
+    def to_dict(self) -> dict[str, dict]:
+        return {
+            point: json.loads(path)
+            for point, path in self.connection.execute("SELECT point, path FROM paths")
+        }
+
+    def export_json(self, path: str = PRECALC_BASE_FILE) -> None:
+        dump_json_atomic(self.to_dict(), path)
+        self._set_meta("json_hash", file_hash(path))
@@ -0,0 +1,190 @@
+"""Uniform grid over the snow areas to test segments only against nearby ones"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import floor
+
+import numba
+import numpy as np
+
+from data import Coordinates, SnowArrays
+from geometry import segment_in_circle
+
+
+@numba.njit(cache=True)
+def _cell(v, n):
+    """Index of the cell containing grid coordinate v, clamped into the grid"""
+    return min(max(int(floor(v)), 0), n - 1)
+
+
+@numba.njit(cache=True)
+def _clip(p1x, p1y, p2x, p2y, x0, y0, x1, y1):
+    """Liang-Barsky clipping of the segment by the rectangle, (t0, t1) along it"""
+    t0, t1 = 0.0, 1.0
+    dx, dy = p2x - p1x, p2y - p1y
+    for p, q in ((-dx, p1x - x0), (dx, x1 - p1x), (-dy, p1y - y0), (dy, y1 - p1y)):
+        if p == 0:
+            if q < 0:
+                return 1.0, 0.0
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+    return t0, t1
+
+
+@numba.njit(cache=True)
+def _segment_candidates(
+    p1x, p1y, p2x, p2y, x0, y0, cell_size, nx, ny, cell_start, cell_items, seen
+):
+    """Marks in `seen` the circles registered in the cells the segment goes through"""
+    t0, t1 = _clip(
+        p1x, p1y, p2x, p2y, x0, y0, x0 + nx * cell_size, y0 + ny * cell_size
+    )
+    if t0 > t1:
+        return
+    dx, dy = p2x - p1x, p2y - p1y
+    # grid coordinates of the clipped segment
+    ax, ay = (p1x + t0 * dx - x0) / cell_size, (p1y + t0 * dy - y0) / cell_size
+    bx, by = (p1x + t1 * dx - x0) / cell_size, (p1y + t1 * dy - y0) / cell_size
+    ix, iy, ex, ey = _cell(ax, nx), _cell(ay, ny), _cell(bx, nx), _cell(by, ny)
+
+    # Amanatides-Woo traversal
+    gdx, gdy = bx - ax, by - ay
+    step_x = 1 if gdx > 0 else -1
+    step_y = 1 if gdy > 0 else -1
+    t_delta_x = abs(1 / gdx) if gdx != 0 else np.inf
+    t_delta_y = abs(1 / gdy) if gdy != 0 else np.inf
+    if gdx > 0:
+        t_max_x = (ix + 1 - ax) / gdx
+    elif gdx < 0:
+        t_max_x = (ax - ix) / -gdx
+    else:
+        t_max_x = np.inf
+    if gdy > 0:
+        t_max_y = (iy + 1 - ay) / gdy
+    elif gdy < 0:
+        t_max_y = (ay - iy) / -gdy
+    else:
+        t_max_y = np.inf
+
+    for _ in range(nx + ny + 1):
+        cell = iy * nx + ix
+        for k in range(cell_start[cell], cell_start[cell + 1]):
+            seen[cell_items[k]] = True
+        if ix == ex and iy == ey:
+            break
+        if t_max_x < t_max_y:
+            t_max_x += t_delta_x
+            ix += step_x
+        else:
+            t_max_y += t_delta_y
+            iy += step_y
+        if not (0 <= ix < nx and 0 <= iy < ny):
+            break
+
+
+@numba.njit(cache=True)
+def _segment_in_indexed_circles(
+    p1x, p1y, p2x, p2y, cx, cy, r, x0, y0, cell_size, nx, ny, cell_start, cell_items
+):
+    """Same as `segment_in_circles`, but only tests the candidate circles"""
+    seen = np.zeros(len(r), dtype=np.bool_)
+    _segment_candidates(
+        p1x, p1y, p2x, p2y, x0, y0, cell_size, nx, ny, cell_start, cell_items, seen
+    )
+    result = np.zeros(len(r))
+    for k in range(len(r)):
+        if seen[k]:
+            result[k] = segment_in_circle(p1x, p1y, p2x, p2y, cx[k], cy[k], r[k])
+    return result
+
+
+@numba.njit(cache=True)
+def _point_candidates(
+    px, py, buff, x0, y0, cell_size, nx, ny, cell_start, cell_items, count
+):
+    """Indices of the circles registered in the cells within `buff` of the point"""
+    seen = np.zeros(count, dtype=np.bool_)
+    lx, hx = (px - buff - x0) / cell_size, (px + buff - x0) / cell_size
+    ly, hy = (py - buff - y0) / cell_size, (py + buff - y0) / cell_size
+    for iy in range(_cell(ly, ny), _cell(hy, ny) + 1):
+        for ix in range(_cell(lx, nx), _cell(hx, nx) + 1):
+            cell = iy * nx + ix
+            for k in range(cell_start[cell], cell_start[cell + 1]):
+                seen[cell_items[k]] = True
+    return np.nonzero(seen)[0]
+
+
+@dataclass
+class SnowIndex:
+    """Snow areas registered in the grid cells touched by their bounding boxes"""
+
+    snow: SnowArrays
+    x0: float
+    y0: float
+    cell_size: float
+    nx: int
+    ny: int
+    # items of the cell i are cell_items[cell_start[i]:cell_start[i + 1]]
+    cell_start: np.ndarray
+    cell_items: np.ndarray
+
+    @classmethod
+    def from_snow(cls, snow: SnowArrays, cell_size: float | None = None):
+        if not len(snow.r):
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(snow, 0, 0, 1, 1, 1, np.zeros(2, dtype=np.int64), empty)
+        x0, y0 = float((snow.x - snow.r).min()), float((snow.y - snow.r).min())
+        x1, y1 = float((snow.x + snow.r).max()), float((snow.y + snow.r).max())
+        if cell_size is None:
+            cell_size = max(2 * float(snow.r.mean()), 1)
+        nx = max(int(np.ceil((x1 - x0) / cell_size)), 1)
+        ny = max(int(np.ceil((y1 - y0) / cell_size)), 1)
+
+        cells: list[list[int]] = [[] for _ in range(nx * ny)]
+        for k in range(len(snow.r)):
+            lx = min(int((snow.x[k] - snow.r[k] - x0) // cell_size), nx - 1)
+            hx = min(int((snow.x[k] + snow.r[k] - x0) // cell_size), nx - 1)
+            ly = min(int((snow.y[k] - snow.r[k] - y0) // cell_size), ny - 1)
+            hy = min(int((snow.y[k] + snow.r[k] - y0) // cell_size), ny - 1)
+            for iy in range(ly, hy + 1):
+                for ix in range(lx, hx + 1):
+                    cells[iy * nx + ix].append(k)
+
+        cell_start = np.zeros(nx * ny + 1, dtype=np.int64)
+        cell_start[1:] = np.cumsum([len(c) for c in cells])
+        cell_items = np.array(sum(cells, []), dtype=np.int64)
+        return cls(snow, x0, y0, cell_size, nx, ny, cell_start, cell_items)
+
+    def _grid(self) -> tuple:
+        return (
+            self.x0,
+            self.y0,
+            self.cell_size,
+            self.nx,
+            self.ny,
+            self.cell_start,
+            self.cell_items,
+        )
+
+    def segment(self, from_pos: Coordinates, to_pos: Coordinates) -> np.ndarray:
+        """Length of the segment inside each of the snow areas"""
+        return _segment_in_indexed_circles(
+            float(from_pos.x),
+            float(from_pos.y),
+            float(to_pos.x),
+            float(to_pos.y),
+            self.snow.x,
+            self.snow.y,
+            self.snow.r,
+            *self._grid(),
+        )
+
+    def near(self, pos: Coordinates, buff: float = 0) -> np.ndarray:
+        """Sorted indices of the snow areas that may be within `buff` of the point"""
+        return _point_candidates(
+            float(pos.x), float(pos.y), float(buff), *self._grid(), len(self.snow.r)
+        )
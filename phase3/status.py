@@ -1,9 +1,42 @@
-from util import get_solution_info
-from data import RoundInfo
-from constants import IDS_FILE, CACHE_FILE
+import argparse
 import json
 
+from util import get_solutions_info, dump_json_atomic
+from data import RoundInfo
+from constants import IDS_FILE, CACHE_FILE, INFO_URL_TEMPLATE, STATUS_CONCURRENCY
+
+
+def poll_statuses(
+    round_ids: list[str],
+    status_cache: dict[str, dict],
+    max_workers: int = STATUS_CONCURRENCY,
+    url_template: str = INFO_URL_TEMPLATE,
+) -> dict[str, RoundInfo | str]:
+    """Infos of all the rounds, fetches only those missing in the cache.
+
+    Finished rounds are added to the cache, pending ones and the ones that could
+    not be fetched (they get the error message) are fetched again next time.
+    """
+    fetched = get_solutions_info(
+        [r for r in round_ids if r not in status_cache], max_workers, url_template
+    )
+    for round_id, solinf in fetched.items():
+        if isinstance(solinf, RoundInfo) and solinf.data.status != "pending":
+            status_cache[round_id] = solinf.to_dict()
+    return {
+        r: fetched[r] if r in fetched else RoundInfo.from_dict(status_cache[r])
+        for r in round_ids
+    }
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-j", "--jobs", type=int, default=STATUS_CONCURRENCY)
+    parser.add_argument(
+        "-u", "--url", default=INFO_URL_TEMPLATE, help="info URL with %%s for round id"
+    )
+    args = parser.parse_args()
+
     status_cache = {}
     try:
         with open(CACHE_FILE, "r") as status_cache_file:
@@ -12,15 +45,9 @@ if __name__ == "__main__":
         pass
     with open(IDS_FILE, "r") as solution_file:
         content = json.load(solution_file)
-        for round_id, msg in content.items():
-            print(round_id + ":")
-            print(f'"{msg}"')
-            if round_id not in status_cache:
-                solinf = get_solution_info(round_id)
-                if solinf.data.status != "pending":
-                    status_cache[round_id] = solinf.to_dict()
-            else:
-                solinf = RoundInfo.from_dict(status_cache[round_id])
-            print(solinf)
-    with open(CACHE_FILE, "w") as status_cache_file:
-        json.dump(status_cache, status_cache_file)
+    infos = poll_statuses(list(content), status_cache, args.jobs, args.url)
+    for round_id, msg in content.items():
+        print(round_id + ":")
+        print(f'"{msg}"')
+        print(infos[round_id])
+    dump_json_atomic(status_cache, CACHE_FILE)
@@ -0,0 +1,216 @@
+"""Non-interactive submission of solutions with retries and a local ledger"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from requests import ConnectionError, ConnectTimeout, RequestException, Response
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from constants import (
+    AUTH_HEADER,
+    IDS_FILE,
+    INFO_URL_TEMPLATE,
+    LEDGER_FILE,
+    SOLUTIONS_PATH,
+    SUBMISSION_URL,
+)
+from data import RoundInfo, Solution, SolutionResponse
+from util import edit_json_file, load, save
+
+REQUEST_TIMEOUT = 60
+MAX_ATTEMPTS = 6
+# delays between attempts are BACKOFF_BASE * 2 ** attempt, but at most BACKOFF_MAX
+BACKOFF_BASE = 2
+BACKOFF_MAX = 120
+POLL_INTERVAL = 5
+POLL_TIMEOUT = 30 * 60
+
+
+def solution_hash(solution: Solution) -> str:
+    return hashlib.sha1(
+        json.dumps(solution.to_dict(), sort_keys=True).encode()
+    ).hexdigest()
+
+
+def not_sent(e: RequestException) -> bool:
+    """Whether the request surely has not reached the server"""
+    if isinstance(e, ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(e, ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def read_ledger(path: str = LEDGER_FILE) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as inp:
+        return [json.loads(line) for line in inp if line.strip()]
+
+
+def append_to_ledger(record: dict, path: str = LEDGER_FILE) -> None:
+    """One JSON object per line, flushed to disk before returning"""
+    with open(path, "a") as out:
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        os.fsync(out.fileno())
+
+
+class Submitter:
+    """Submits queued solutions one by one and waits for each of them to be scored.
+
+    Network errors, 429 and 5xx responses are retried with exponential backoff,
+    but a submission only if it has not reached the server (or got 429), so a
+    round is never submitted twice. Every submission is appended to the ledger,
+    also a failed one, solutions accepted before (by hash) are not submitted
+    again. A solution that fails does not stop the rest of the queue.
+    """
+
+    def __init__(
+        self,
+        submission_url: str = SUBMISSION_URL,
+        info_url_template: str = INFO_URL_TEMPLATE,
+        ledger_path: str = LEDGER_FILE,
+    ):
+        self.submission_url = submission_url
+        self.info_url_template = info_url_template
+        self.ledger_path = ledger_path
+        self.queue: deque[tuple[Solution, str]] = deque()
+        self.session = Session()
+        self.session.headers.update(AUTH_HEADER)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "Submitter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.session.close()
+
+    def put(self, solution: Solution, label: str) -> None:
+        self.queue.append((solution, label))
+
+    def _request(
+        self, method: str, url: str, idempotent: bool = True, **kwargs
+    ) -> Response:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.session.request(
+                    method, url, timeout=REQUEST_TIMEOUT, **kwargs
+                )
+                # 429 is a refusal, a 5xx may come after the request was processed
+                if response.status_code == 429 or (
+                    idempotent and response.status_code >= 500
+                ):
+                    reason = f"HTTP {response.status_code}"
+                else:
+                    return response
+            except RequestException as e:
+                if not idempotent and not not_sent(e):
+                    raise
+                reason = repr(e)
+            if attempt == MAX_ATTEMPTS - 1:
+                break
+            delay = min(BACKOFF_BASE * 2**attempt, BACKOFF_MAX)
+            print(f"{method} {url} failed ({reason}), retrying in {delay}s...")
+            time.sleep(delay)
+        raise RuntimeError(f"{method} {url} failed {MAX_ATTEMPTS} times: {reason}")
+
+    def submit(self, solution: Solution) -> SolutionResponse:
+        response = self._request(
+            "POST", self.submission_url, idempotent=False, json=solution.to_dict()
+        )
+        return SolutionResponse.from_json(response.text)
+
+    def wait_for_result(self, round_id: str) -> RoundInfo:
+        """Polls the round until it is not pending anymore"""
+        deadline = time.monotonic() + POLL_TIMEOUT
+        while True:
+            response = self._request("GET", self.info_url_template % round_id)
+            info = RoundInfo.from_json(response.text)
+            if info.data.status != "pending" or time.monotonic() > deadline:
+                return info
+            time.sleep(POLL_INTERVAL)
+
+    def process(self, solution: Solution, label: str) -> dict:
+        """Submits the solution, waits for its result and records it in the ledger"""
+        record = {
+            "label": label,
+            "solution_sha1": solution_hash(solution),
+            "submitted_at": datetime.now(timezone.utc).isoformat(),
+            "success": False,
+            "error": None,
+        }
+        try:
+            response = self.submit(solution)
+            record.update(success=response.success, error=response.error)
+            if response.success:
+                record["round_id"] = response.round_id
+                save(solution, SOLUTIONS_PATH + f"{response.round_id}.json")
+                with edit_json_file(IDS_FILE) as ids:
+                    ids[response.round_id] = label
+                info = self.wait_for_result(response.round_id)
+                record.update(
+                    status=info.data.status,
+                    total_time=info.data.total_time,
+                    total_happy=info.data.total_happy,
+                    error_message=info.data.error_message,
+                )
+        except Exception as e:
+            record.update(status="error", error_message=repr(e))
+            raise
+        finally:
+            append_to_ledger(record, self.ledger_path)
+        return record
+
+    def run(self) -> list[dict]:
+        """Processes the whole queue, skipping the solutions submitted before"""
+        submitted = {
+            r["solution_sha1"] for r in read_ledger(self.ledger_path) if r["success"]
+        }
+        records = []
+        while self.queue:
+            solution, label = self.queue.popleft()
+            if solution_hash(solution) in submitted:
+                print(f"{label}: already submitted, skipping")
+                continue
+            try:
+                record = self.process(solution, label)
+            except Exception as e:
+                print(f"{label}: failed ({e!r}), continuing with the queue")
+                continue
+            if record["success"]:
+                submitted.add(record["solution_sha1"])
+            records.append(record)
+            print(record)
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("solutions", nargs="+", help="JSON files with solutions")
+    parser.add_argument("-l", "--label", help="label of the rounds, file name if empty")
+    parser.add_argument("--submission-url", default=SUBMISSION_URL)
+    parser.add_argument(
+        "--info-url", default=INFO_URL_TEMPLATE, help="info URL with %%s for round id"
+    )
+    parser.add_argument("--ledger", default=LEDGER_FILE)
+    args = parser.parse_args()
+
+    with Submitter(args.submission_url, args.info_url, args.ledger) as submitter:
+        for path in args.solutions:
+            label = args.label or os.path.splitext(os.path.basename(path))[0]
+            submitter.put(load(Solution, path), label)
+        submitter.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,28 @@ from __future__ import annotations
 import json
 import os.path
 from collections import defaultdict
-from math import ceil, sqrt
+from math import ceil, inf, sqrt
 
+import numpy as np
 from astar import AStar
 from tqdm import tqdm
 
-from data import Coordinates, Matrix, Circle, Route
+from data import Coordinates, Circle, Route
 # from optimal_path import PenatyChecker, ObjectiveChecker, WidePathMutator
-from util import load_map, load_bags, save, cleanup_jumps_to_start, load, path_len
+from util import (
+    load_map,
+    load_bags,
+    save,
+    cleanup_jumps_to_start,
+    load,
+    path_len,
+    bounded_path_len,
+    get_map_hash,
+    get_snow_index,
+)
 from checker import segment_dist, segment_time, emulate
-from constants import BASE_SPEED, MAX_COORD
+from constants import BASE_SPEED, MAX_COORD, STAR_MATRIX_PATH
+from time_matrix import save_matrix
 from itertools import product
 from functools import lru_cache
 # from optimal_path import OptimalPathFinder
@@ -23,8 +35,8 @@ CACHE_SIZE = 65536 * 2
 
 @lru_cache(maxsize=CACHE_SIZE)
 def is_near_circle(node: Coordinates, buff=BASE_STEP) -> bool:
-    for s in map_data.snow_areas:
-        c = Circle.from_snow(s)
+    for k in get_snow_index(map_data.snow_areas).near(node, buff):
+        c = Circle.from_snow(map_data.snow_areas[k])
         c.radius += buff
         if node.in_circle(c):
             return True
@@ -33,8 +45,8 @@ def is_near_circle(node: Coordinates, buff=BASE_STEP) -> bool:
 
 @lru_cache(maxsize=CACHE_SIZE)
 def get_outside(node: Coordinates) -> Coordinates | None:
-    for s in map_data.snow_areas:
-        c = Circle.from_snow(s)
+    for k in get_snow_index(map_data.snow_areas).near(node):
+        c = Circle.from_snow(map_data.snow_areas[k])
         if node.in_circle(c):
             return get_nearest_point_outside(c, node)
     return None
@@ -80,13 +92,12 @@ def expand_moves(m: list[Coordinates]) -> list[Coordinates]:
     for next_pos in tqdm(m[1:]):
         prev_out = get_outside(prev_pos) or prev_pos
         next_out = get_outside(next_pos) or next_pos
-        path = min(
+        path = shortest(
             [prev_pos, next_pos],
             [prev_pos, prev_out, next_out, next_pos],
             # optimal_path(prev_pos, next_pos),
             # [prev_pos] + optimal_path(prev_out, next_out) + [next_pos],
             list(SusStar(next_pos).astar(prev_pos, next_pos)),
-            key=pl,
         )
         result.extend(path)
         prev_pos = next_pos
@@ -98,6 +109,16 @@ def pl(p):
     return path_len(p, map_data.snow_areas)
 
 
+def shortest(*paths: list[Coordinates]) -> list[Coordinates]:
+    """Same as min(paths, key=pl), but stops evaluating paths longer than the best"""
+    best, best_len = None, inf
+    for p in paths:
+        length = bounded_path_len(p, map_data.snow_areas, best_len)
+        if length is not None and length < best_len:
+            best, best_len = p, length
+    return best
+
+
 # @lru_cache(maxsize=CACHE_SIZE)
 # def optimal_path(start: Coordinates, end: Coordinates):
 #     return (
@@ -154,7 +175,7 @@ def get_nearest_point_outside(circle: Circle, inside_pos: Coordinates):
 
 def make_matrix(vertices: list[Coordinates]):
     num_v = len(vertices)
-    result = [[0] * num_v for _ in range(num_v)]
+    result = np.zeros((num_v, num_v))
     edges: dict[str, dict[str, list[Coordinates]]] = defaultdict(dict)
     with tqdm(total=num_v * num_v // 2) as pbar:
         for i in range(num_v):
@@ -173,14 +194,13 @@ def make_matrix(vertices: list[Coordinates]):
                     ]
                     path = max(((p, pl(p)) for p in paths), key=lambda x: x[1])
                     moves, length = path
-                    result[i][j] = result[j][i] = length
+                    result[i, j] = result[j, i] = length
                     edges[prev_pos.to_str()][next_pos.to_str()] = moves
                     pbar.update()
 
-    with open('./data/star_matrix.json') as out:
-        json.dump(result, out)
+    save_matrix(STAR_MATRIX_PATH, result, vertices, get_map_hash(), wind=False)
 
-    with open('./data/star_edges.json') as out:
+    with open('./data/star_edges.json', "w") as out:
         json.dump(edges, out)
 
 
@@ -0,0 +1,44 @@
+"""The vectorized code has to give the same results as the data classes on maps
+other than the map file"""
+from __future__ import annotations
+
+import pytest
+
+from checker import validate
+from data import Coordinates, Present, Solution
+from greedy import get_sol_cost
+from map_generator import generate_map
+
+SEED = 42
+
+
+@pytest.fixture(scope="module")
+def generated_map():
+    return generate_map(children=50, snow_areas=5, gifts=200, seed=SEED)
+
+
+@pytest.fixture(scope="module")
+def presents(generated_map) -> list[Present]:
+    return [
+        Present(gift_id=g.id, child_id=i)
+        for i, g in enumerate(generated_map.gifts[: len(generated_map.children)])
+    ]
+
+
+def test_sol_cost(generated_map, presents):
+    prices = {g.id: g.price for g in generated_map.gifts}
+    expected = sum(prices[p.gift_id] for p in presents)
+    assert get_sol_cost(generated_map, presents) == expected
+
+
+def test_validate(generated_map, presents):
+    # every gift in its own bag, delivered in its own trip
+    moves = []
+    for c in generated_map.children:
+        moves += [c.coords(), Coordinates(0, 0)]
+    solution = Solution(
+        moves=moves[:-1],
+        stack_of_bags=[[p.gift_id] for p in presents[::-1]],
+        map_id="generated",
+    )
+    assert validate(solution, generated_map) is None
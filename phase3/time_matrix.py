@@ -0,0 +1,136 @@
+"""All-pairs travel time matrix built in compiled blocks"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Callable
+
+import numba
+import numpy as np
+
+from constants import BASE_SPEED, SNOW_SPEED, WIND_SPEED
+from data import Coordinates, SnowArea
+from geometry import segment_in_circles
+from util import get_snow_arrays
+
+# (pairs done, pairs total)
+ProgressCallback = Callable[[int, int], None]
+
+BLOCK_SIZE = 64
+# bumped when the meaning of stored matrices changes
+MATRIX_FORMAT = 3
+
+
+@numba.njit(cache=True)
+def _segment_time(dist, snow_dist, dx, dy, wind):
+    # same as util.segment_time
+    if wind and (dx != 0 or dy != 0):
+        speed = BASE_SPEED + WIND_SPEED * dx / (abs(dx) + abs(dy))
+    else:
+        speed = BASE_SPEED
+    return snow_dist / SNOW_SPEED + (dist - snow_dist) / speed
+
+
+@numba.njit(parallel=True, cache=True)
+def _time_matrix_rows(xs, ys, start, stop, cx, cy, r, wind):
+    """Rows [start, stop) of the lower triangle in both directions.
+
+    Row i of the first array holds the times from i to every j < i, of the second
+    one - from every j < i to i. Lengths (also in snow) do not depend on direction,
+    so they are computed once per pair.
+    """
+    there = np.zeros((stop - start, len(xs)))
+    back = np.zeros((stop - start, len(xs)))
+    for row in numba.prange(stop - start):
+        i = start + row
+        for j in range(i):
+            dx, dy = xs[j] - xs[i], ys[j] - ys[i]
+            dist = (dx**2 + dy**2) ** 0.5
+            snow_dist = segment_in_circles(
+                xs[i], ys[i], xs[j], ys[j], cx, cy, r
+            ).sum()
+            there[row, j] = _segment_time(dist, snow_dist, dx, dy, wind)
+            back[row, j] = _segment_time(dist, snow_dist, -dx, -dy, wind)
+    return there, back
+
+
+def time_matrix(
+    vertices: list[Coordinates],
+    snow_areas: list[SnowArea],
+    wind: bool = True,
+    progress: ProgressCallback | None = None,
+    block_size: int = BLOCK_SIZE,
+) -> np.ndarray:
+    """Travel times between all the vertices, result[i, j] is the time from i to j.
+
+    With wind the matrix is asymmetric.
+    """
+    snow = get_snow_arrays(snow_areas)
+    xs = np.array([v.x for v in vertices], dtype=np.float64)
+    ys = np.array([v.y for v in vertices], dtype=np.float64)
+    num_vertices = len(vertices)
+    total = num_vertices * (num_vertices - 1) // 2
+
+    there = np.zeros((num_vertices, num_vertices))
+    back = np.zeros((num_vertices, num_vertices))
+    for start in range(0, num_vertices, block_size):
+        stop = min(start + block_size, num_vertices)
+        there[start:stop], back[start:stop] = _time_matrix_rows(
+            xs, ys, start, stop, snow.x, snow.y, snow.r, wind
+        )
+        if progress is not None:
+            progress(stop * (stop - 1) // 2, total)
+
+    return there + back.T
+
+
+def _meta_path(path: str) -> str:
+    return path + ".json"
+
+
+def vertices_hash(vertices: list[Coordinates]) -> str:
+    """Hash of the coordinates in order, the rows and columns of the matrix"""
+    coords = np.array([(v.x, v.y) for v in vertices], dtype=np.int64)
+    return hashlib.sha1(coords.tobytes()).hexdigest()
+
+
+def save_matrix(
+    path: str,
+    matrix: np.ndarray,
+    vertices: list[Coordinates],
+    map_hash: str,
+    wind: bool,
+) -> None:
+    """Stores the matrix as .npy with a small JSON header next to it"""
+    np.save(path, np.asarray(matrix, dtype=np.float64))
+    with open(_meta_path(path), "w") as out:
+        json.dump(
+            {
+                "format": MATRIX_FORMAT,
+                "map_hash": map_hash,
+                "vertices_hash": vertices_hash(vertices),
+                "wind": wind,
+                "shape": matrix.shape,
+            },
+            out,
+        )
+
+
+def load_matrix(
+    path: str, vertices: list[Coordinates], map_hash: str, wind: bool
+) -> np.ndarray | None:
+    """Memory-maps the stored matrix, None if it is missing or built for other data"""
+    if not os.path.exists(path) or not os.path.exists(_meta_path(path)):
+        return None
+    with open(_meta_path(path), "r") as inp:
+        meta = json.load(inp)
+    if meta.get("format") != MATRIX_FORMAT:
+        return None
+    if (meta["map_hash"], meta["vertices_hash"], meta["wind"]) != (
+        map_hash,
+        vertices_hash(vertices),
+        wind,
+    ):
+        return None
+    return np.load(path, mmap_mode="r")
@@ -1,14 +1,26 @@
+import hashlib
 import json
+import os
+import pickle
+import tempfile
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, IO, TYPE_CHECKING
 
-from requests import post, get
+import numpy as np
+from requests import post, get, Session
+from requests.adapters import HTTPAdapter
 
 from constants import (
     SUBMISSION_URL,
     AUTH_HEADER,
     MAP_URL,
     MAP_FILE_PATH,
+    MAP_CACHE_PATH,
+    MAP_CACHE_FORMAT,
     INFO_URL_TEMPLATE,
+    STATUS_CONCURRENCY,
+    STATUS_TIMEOUT,
 )
 from constants import BASE_SPEED, WIND_SPEED, SNOW_SPEED
 from data import (
@@ -18,11 +30,31 @@ from data import (
     RoundInfo,
     Coordinates,
     SnowArea,
-    Line,
-    Circle,
+    SnowArrays,
     Bag,
 )
 
+if TYPE_CHECKING:
+    from snow_index import SnowIndex
+
+
+def write_atomic(path: str, write: Callable[[IO], None], mode: str = "w") -> None:
+    """Writes to a temporary file first, so the old content survives a crash"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode) as tmp:
+            write(tmp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def dump_json_atomic(obj, path: str) -> None:
+    write_atomic(path, lambda out: json.dump(obj, out))
+
 
 class edit_json_file:
     def __init__(self, path, default={}):
@@ -35,13 +67,10 @@ class edit_json_file:
                 self.res = json.load(tmp)
         except:
             self.res = self.default
-        self.file = open(self.path, "a+")
         return self.res
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.file.truncate(0)
-        json.dump(self.res, self.file)
-        self.file.close()
+        dump_json_atomic(self.res, self.path)
 
 
 class read_json_file:
@@ -86,8 +115,51 @@ def save_map(parsed_map: Map) -> None:
     save(parsed_map, MAP_FILE_PATH)
 
 
+# the map last returned by `load_map` and the hash of the file it was read from
+_map_file: tuple[Map, str] | None = None
+
+
 def load_map() -> Map:
-    return load(Map, MAP_FILE_PATH)
+    """Parsed map, unpickled from the cache while the map file stays the same"""
+    global _map_file
+    with open(MAP_FILE_PATH, "rb") as map_file:
+        raw = map_file.read()
+    map_hash = hashlib.sha1(raw).hexdigest()
+    key = (MAP_CACHE_FORMAT, map_hash)
+    try:
+        with open(MAP_CACHE_PATH, "rb") as cache:
+            cached_key, cached_map = pickle.load(cache)
+        if cached_key == key:
+            _map_file = cached_map, map_hash
+            return cached_map
+    except Exception:
+        # missing or broken cache, or one pickled with other data classes
+        pass
+
+    parsed_map = Map.from_json(raw.decode())
+    write_atomic(
+        MAP_CACHE_PATH,
+        lambda out: pickle.dump((key, parsed_map), out, pickle.HIGHEST_PROTOCOL),
+        "wb",
+    )
+    _map_file = parsed_map, map_hash
+    return parsed_map
+
+
+def loaded_map_hash(m: Map) -> str | None:
+    """Hash of the map file if `m` is the map `load_map` last returned for it"""
+    if _map_file is not None and _map_file[0] is m:
+        return _map_file[1]
+    return None
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as inp:
+        return hashlib.sha1(inp.read()).hexdigest()
+
+
+def get_map_hash(path: str = MAP_FILE_PATH) -> str:
+    return file_hash(path)
 
 
 def get_solution_info(solution_id: str) -> RoundInfo:
@@ -95,6 +167,35 @@ def get_solution_info(solution_id: str) -> RoundInfo:
     return RoundInfo.from_json(response.text)
 
 
+def get_solutions_info(
+    solution_ids: list[str],
+    max_workers: int = STATUS_CONCURRENCY,
+    url_template: str = INFO_URL_TEMPLATE,
+    timeout: float = STATUS_TIMEOUT,
+) -> dict[str, RoundInfo | str]:
+    """Fetches the rounds concurrently over one keep-alive session.
+
+    A round that could not be fetched gets the error message instead of the info.
+    """
+    if not solution_ids:
+        return {}
+    with Session() as session, ThreadPoolExecutor(max_workers) as pool:
+        session.headers.update(AUTH_HEADER)
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def fetch(solution_id: str) -> RoundInfo | str:
+            try:
+                response = session.get(url_template % solution_id, timeout=timeout)
+                return RoundInfo.from_json(response.text)
+            # network errors and responses that are not round infos
+            except Exception as e:
+                return repr(e)
+
+        return dict(zip(solution_ids, pool.map(fetch, solution_ids)))
+
+
 def info_about_map(m: Map) -> None:
     print("=== MAP INFO ===")
     print(f"Number of children: {len(m.children)}")
@@ -159,15 +260,52 @@ def load_bags() -> list[Bag]:
     return stack_of_bags
 
 
+_snow_cache: "tuple[list[SnowArea], SnowArrays, SnowIndex] | None" = None
+
+
+def _get_snow_cache(snow_areas: list[SnowArea]) -> tuple:
+    # the same list of snow areas is passed on every call, so convert it once
+    from snow_index import SnowIndex
+
+    global _snow_cache
+    if _snow_cache is None or _snow_cache[0] is not snow_areas:
+        snow = SnowArrays.from_snow_areas(snow_areas)
+        _snow_cache = snow_areas, snow, SnowIndex.from_snow(snow)
+    return _snow_cache
+
+
+def get_snow_arrays(snow_areas: list[SnowArea]) -> SnowArrays:
+    return _get_snow_cache(snow_areas)[1]
+
+
+def get_snow_index(snow_areas: list[SnowArea]) -> "SnowIndex":
+    return _get_snow_cache(snow_areas)[2]
+
+
+def warm_up() -> None:
+    """Compiles the geometry kernels or loads them from the numba cache.
+
+    Entry points call it once, so the first real query does not wait for the JIT.
+    """
+    from geometry import segment_in_circle
+
+    snow_areas = [SnowArea(r=1, x=0, y=0), SnowArea(r=1, x=3, y=0)]
+    moves = [Coordinates(-2, 0), Coordinates(5, 0), Coordinates(5, 5)]
+    path_len(moves, snow_areas)
+    bounded_path_len(moves, snow_areas, 1)
+    segment_dist(moves[0], moves[1], snow_areas)
+    get_snow_index(snow_areas).near(moves[0], 1)
+    # Line.distance_in_circle passes the integer coordinates of the map
+    segment_in_circle(-2, 0, 5, 0, 0, 0, 1)
+
+
 def segment_dist(
         from_pos: Coordinates, to_pos: Coordinates, snow_areas: list[SnowArea]
 ) -> tuple[float, float, list[float]]:
     dist = from_pos.dist(to_pos)
-    line = Line.from_two_points(from_pos, to_pos)
-    distances_in_snow = [
-        line.distance_in_circle(Circle.from_snow(snow)) for snow in snow_areas
-    ]
-    snow_dist = sum(distances_in_snow)
+    distances_in_snow = get_snow_index(snow_areas).segment(from_pos, to_pos)
+    snow_dist = float(distances_in_snow.sum())
+    distances_in_snow = distances_in_snow.tolist()
     assert snow_dist <= dist or snow_dist - dist < 1
     return dist, snow_dist, distances_in_snow
 
@@ -187,5 +325,51 @@ def st(n1: Coordinates, n2: Coordinates, snow_areas: list[SnowArea]):
     return segment_time(d, s)
 
 
+def _path_segments(
+    moves: list[Coordinates], snow_areas: list[SnowArea]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Direction, length and length in snow of every segment of the path"""
+    from geometry import segments_in_circles
+
+    snow = get_snow_arrays(snow_areas)
+    points = np.array([(c.x, c.y) for c in moves], dtype=np.float64)
+    directions = points[1:] - points[:-1]
+    dists = np.hypot(*directions.T)
+    snow_dists = segments_in_circles(
+        points[:-1], points[1:], snow.x, snow.y, snow.r
+    ).sum(axis=1)
+    return directions, dists, snow_dists
+
+
 def path_len(moves: list[Coordinates], snow_areas: list[SnowArea]):
-    return sum(st(a, b, snow_areas) for a, b in zip(moves[:-1], moves[1:]))
+    if len(moves) < 2:
+        return 0
+    _, dists, snow_dists = _path_segments(moves, snow_areas)
+    return float(np.sum(snow_dists / SNOW_SPEED + (dists - snow_dists) / BASE_SPEED))
+
+
+def bounded_path_len(
+    moves: list[Coordinates], snow_areas: list[SnowArea], bound: float
+) -> float | None:
+    """Same as `path_len`, but None as soon as the length exceeds the bound"""
+    from geometry import bounded_path_time
+
+    snow = get_snow_arrays(snow_areas)
+    points = np.array([(c.x, c.y) for c in moves], dtype=np.float64).reshape(-1, 2)
+    length = bounded_path_time(
+        points, snow.x, snow.y, snow.r, BASE_SPEED, SNOW_SPEED, bound
+    )
+    return None if length > bound else length
+
+
+def path_time(moves: list[Coordinates], snow_areas: list[SnowArea]) -> float:
+    """Same as `path_len`, but takes the wind into account like `segment_time`"""
+    if len(moves) < 2:
+        return 0
+    directions, dists, snow_dists = _path_segments(moves, snow_areas)
+    manhattan = np.abs(directions).sum(axis=1)
+    k = np.divide(
+        directions[:, 0], manhattan, out=np.zeros(len(manhattan)), where=manhattan > 0
+    )
+    speed = BASE_SPEED + WIND_SPEED * k
+    return float(np.sum(snow_dists / SNOW_SPEED + (dists - snow_dists) / speed))
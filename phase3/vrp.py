@@ -1,101 +1,141 @@
 """Capacited Vehicles Routing Problem (CVRP)."""
 from __future__ import annotations
 
+import argparse
+import os
+import time
+from math import inf
+from multiprocessing import Pool
+
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 from tqdm import tqdm
 
-import json
-import os
+import numpy as np
 
-from data import Map, Bag, Coordinates, SnowArea, Route, Matrix, Path
+from data import Map, Bag, Coordinates, SnowArea, Route
 from util import (
     load_map,
     load_bags,
+    load,
     save,
     cleanup_jumps_to_start,
-    segment_dist,
-    segment_time,
+    get_map_hash,
+    path_time,
+    dump_json_atomic,
+)
+from time_matrix import time_matrix, save_matrix, load_matrix
+from local_search import improve_trips, trips_time
+from constants import (
+    TIMES_MATRIX_PATH,
+    PORTFOLIO_MATRIX_PATH,
+    PORTFOLIO_RESULTS_PATH,
+    VRP_SOLUTION_PATH,
+    MAP_ID,
 )
-from constants import BASE_SPEED, TIMES_MATRIX_PATH, MAP_ID, PRECALC_BASE_FILE
-from copy import deepcopy
+from precalc_store import PrecalcStore
 
 
-def update_matrix(matrix: Matrix, vertices: list[Coordinates]) -> Matrix:
-    result = deepcopy(matrix)
+def update_matrix(
+    matrix: np.ndarray, vertices: list[Coordinates], snow_areas: list[SnowArea]
+) -> np.ndarray:
+    result = np.array(matrix)
     i = 0
-    with open(PRECALC_BASE_FILE, "r") as inp:
-        pb = json.load(inp)
+    with PrecalcStore() as pb:
         for j in range(1, len(matrix)):
-            # TODO: from i to j is not the same as from j to i due to wind. Fix it.
-            result[i][j] = result[j][i] = (
-                Path.from_dict(pb[vertices[j].to_str()]).length / BASE_SPEED
-            )
+            path = pb[vertices[j].to_str()].path
+            result[i, j] = path_time(path, snow_areas)
+            result[j, i] = path_time(path[::-1], snow_areas)
     return result
 
 
 def expand(path: list[Coordinates]):
-    with open(PRECALC_BASE_FILE, "r") as inp:
-        pb = json.load(inp)
     result: list[Coordinates] = []
     prev_pos = path[0]
-    for next_pos in path[1:]:
-        if Coordinates(0, 0) in (prev_pos, next_pos):
-            path = (
-                Path.from_dict(pb[next_pos.to_str()]).path
-                if next_pos != Coordinates(0, 0)
-                else Path.from_dict(pb[prev_pos.to_str()]).path[::-1]
-            )
-            result.extend(path)
-        else:
-            result.extend([prev_pos, next_pos])
-        prev_pos = next_pos
+    with PrecalcStore() as pb:
+        for next_pos in path[1:]:
+            if Coordinates(0, 0) in (prev_pos, next_pos):
+                path = (
+                    pb[next_pos.to_str()].path
+                    if next_pos != Coordinates(0, 0)
+                    else pb[prev_pos.to_str()].path[::-1]
+                )
+                result.extend(path)
+            else:
+                result.extend([prev_pos, next_pos])
+            prev_pos = next_pos
     return result
 
 
 def make_distance_matrix(
     vertices: list[Coordinates], snow_areas: list[SnowArea], force_recalc=False
-) -> Matrix:
-    num_vertices = len(vertices)
-    result: Matrix = [[0] * num_vertices for _ in range(num_vertices)]
-
-    if force_recalc or not os.path.exists(TIMES_MATRIX_PATH):
-        with tqdm(total=num_vertices * num_vertices // 2) as pbar:
-            for i in range(num_vertices):
-                for j in range(num_vertices):
-                    if i > j:
-                        dist, snow_dist, _ = segment_dist(
-                            vertices[i], vertices[j], snow_areas
-                        )
-                        time = segment_time(dist, snow_dist, vertices[j] - vertices[i])
-                        result[i][j] = result[j][i] = time
-                        pbar.update()
-        with open(TIMES_MATRIX_PATH, "w") as out:
-            json.dump(result, out)
-    else:
-        with open(TIMES_MATRIX_PATH, "r") as inp:
-            result = json.load(inp)
+) -> np.ndarray:
+    map_hash = get_map_hash()
+    result = None
+    if not force_recalc:
+        result = load_matrix(TIMES_MATRIX_PATH, vertices, map_hash, wind=True)
+
+    if result is None:
+        with tqdm(total=len(vertices) * (len(vertices) - 1) // 2) as pbar:
+            result = time_matrix(
+                vertices,
+                snow_areas,
+                progress=lambda done, _: pbar.update(done - pbar.n),
+            )
+        save_matrix(TIMES_MATRIX_PATH, result, vertices, map_hash, wind=True)
     return result
 
 
+def candidate_lists(matrix: np.ndarray, k: int) -> list[list[int]]:
+    """Nodes that may follow every node: its k nearest children by travel time and
+    the children it is among the k nearest of. The depot is not listed, going back
+    to it is always allowed."""
+    times = np.array(matrix[1:, 1:], dtype=np.float64)
+    np.fill_diagonal(times, np.inf)
+    k = min(k, len(times) - 1)
+    nearest = np.argpartition(times, k - 1, axis=1)[:, :k] + 1 if k > 0 else []
+    candidates = [set() for _ in range(len(matrix))]
+    for node, neighbours in enumerate(nearest, start=1):
+        for neighbour in neighbours:
+            candidates[node].add(int(neighbour))
+            candidates[neighbour].add(node)
+    return [sorted(c) for c in candidates]
+
+
+def add_route_arcs(candidates: list[list[int]], routes: list[list[int]]) -> None:
+    """Allows the arcs between the children of the routes, so they stay feasible"""
+    for route in routes:
+        for node, next_node in zip(route, route[1:]):
+            if next_node not in candidates[node]:
+                candidates[node].append(next_node)
+
+
 def create_data_model(
     vertices: list[Coordinates],
     snow_areas: list[SnowArea],
     stack_of_bags: list[Bag],
-    distance_matrix: Matrix | None,
+    distance_matrix: np.ndarray | None,
+    neighbours: int | None = None,
+    candidate_penalty: int | None = None,
 ) -> dict:
     """Stores the data for the problem."""
     data = {}
     matrix = (
         distance_matrix
-        if distance_matrix
-        else update_matrix(make_distance_matrix(vertices, snow_areas), vertices)
+        if distance_matrix is not None
+        else update_matrix(
+            make_distance_matrix(vertices, snow_areas), vertices, snow_areas
+        )
     )
-    data["distance_matrix"] = [[round(e) for e in row] for row in matrix]
+    data["distance_matrix"] = np.rint(matrix).astype(np.int64)
     data["demands"] = [0] + [1] * (len(vertices) - 1)
     data["vehicle_capacities"] = [len(bag) for bag in stack_of_bags[::-1]]
     data["num_vehicles"] = len(stack_of_bags)
     data["depot"] = 0
+    data["candidates"] = (
+        candidate_lists(data["distance_matrix"], neighbours) if neighbours else None
+    )
+    data["candidate_penalty"] = candidate_penalty
     return data
 
 
@@ -145,21 +185,28 @@ def print_solution(
     return moves
 
 
-def solve(
-    map_data: Map,
-    stack_of_bags: list[Bag],
-    distance_matrix: Matrix | None = None,
-    tl: int = 1,
-):
-    """Solve the CVRP problem."""
-    # Instantiate the data problem.
-    vertices: list[Coordinates] = [Coordinates(0, 0)] + [
-        c.coords() for c in map_data.children
-    ]
-    data = create_data_model(
-        vertices, map_data.snow_areas, stack_of_bags, distance_matrix
-    )
+# (first solution strategy, local search metaheuristic) pairs tried by the portfolio
+PORTFOLIO = [
+    ("PATH_CHEAPEST_ARC", "GUIDED_LOCAL_SEARCH"),
+    ("SAVINGS", "GUIDED_LOCAL_SEARCH"),
+    ("PARALLEL_CHEAPEST_INSERTION", "GUIDED_LOCAL_SEARCH"),
+    ("CHRISTOFIDES", "GUIDED_LOCAL_SEARCH"),
+    ("PATH_CHEAPEST_ARC", "SIMULATED_ANNEALING"),
+    ("SAVINGS", "TABU_SEARCH"),
+    ("LOCAL_CHEAPEST_INSERTION", "GUIDED_LOCAL_SEARCH"),
+    ("PATH_MOST_CONSTRAINED_ARC", "GUIDED_LOCAL_SEARCH"),
+]
+
 
+def create_routing_model(data: dict):
+    """Routing model with the data costs and the bag capacities.
+
+    With candidate lists in the data, arcs to other children are forbidden, or
+    cost `candidate_penalty` more if it is set (then the objective includes it).
+    Forbidden arcs usually leave no first solution when every bag has to be
+    filled, so the restricted model is solved from routes allowed in it, see
+    `seed_candidates`.
+    """
     # Create the routing index manager.
     manager = pywrapcp.RoutingIndexManager(
         len(data["distance_matrix"]), data["num_vehicles"], data["depot"]
@@ -168,27 +215,25 @@ def solve(
     # Create Routing Model.
     routing = pywrapcp.RoutingModel(manager)
 
-    # Create and register a transit callback.
-    def distance_callback(from_index, to_index):
-        """Returns the distance between the two nodes."""
-        # Convert from routing variable Index to distance matrix NodeIndex.
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return data["distance_matrix"][from_node][to_node]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+    # Register the matrix and the demands as they are, so OR-Tools evaluates the
+    # arcs in C++ instead of calling back into Python. OR-Tools keeps its own copy
+    # of the matrix, so every model (and process) holds one.
+    matrix = np.asarray(data["distance_matrix"])
+    candidates = data.get("candidates")
+    penalty = data.get("candidate_penalty")
+    if candidates is not None and penalty is not None:
+        allowed = np.zeros(matrix.shape, dtype=bool)
+        allowed[0, :] = allowed[:, 0] = True
+        for node, nodes in enumerate(candidates):
+            allowed[node, nodes] = True
+        matrix = np.where(allowed, matrix, matrix + penalty)
+    transit_callback_index = routing.RegisterTransitMatrix(matrix.tolist())
 
     # Define cost of each arc.
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
     # Add Capacity constraint.
-    def demand_callback(from_index):
-        """Returns the demand of the node."""
-        # Convert from routing variable Index to demands NodeIndex.
-        from_node = manager.IndexToNode(from_index)
-        return data["demands"][from_node]
-
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+    demand_callback_index = routing.RegisterUnaryTransitVector(data["demands"])
     routing.AddDimensionWithVehicleCapacity(
         demand_callback_index,
         0,  # null capacity slack
@@ -197,36 +242,363 @@ def solve(
         "Capacity",
     )
 
+    if candidates is not None and penalty is None:
+        ends = [routing.End(v) for v in range(data["num_vehicles"])]
+        for node in range(1, len(candidates)):
+            routing.NextVar(manager.NodeToIndex(node)).SetValues(
+                [manager.NodeToIndex(n) for n in candidates[node]] + ends
+            )
+
     # Allow to drop nodes.
     # penalty = 1000
     # for node in range(1, len(data['distance_matrix'])):
     #     routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
+    return manager, routing
+
 
-    # Setting first solution heuristic.
+def create_search_parameters(
+    first_solution: str = "PATH_CHEAPEST_ARC",
+    metaheuristic: str = "GUIDED_LOCAL_SEARCH",
+    tl: int = 1,
+):
     search_parameters = pywrapcp.DefaultRoutingSearchParameters()
     search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        getattr(routing_enums_pb2.FirstSolutionStrategy, first_solution)
     )
     search_parameters.local_search_metaheuristic = (
-        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        getattr(routing_enums_pb2.LocalSearchMetaheuristic, metaheuristic)
     )
     search_parameters.time_limit.FromSeconds(tl)
+    return search_parameters
 
-    # Solve the problem.
+
+def get_routes(data, manager, routing, assignment) -> list[list[int]]:
+    """Nodes visited by every vehicle, from the start depot to the end one"""
+    routes = []
+    for vehicle_id in range(data["num_vehicles"]):
+        index = routing.Start(vehicle_id)
+        route = [manager.IndexToNode(index)]
+        while not routing.IsEnd(index):
+            index = assignment.Value(routing.NextVar(index))
+            route.append(manager.IndexToNode(index))
+        routes.append(route)
+    return routes
+
+
+def improve_routes(matrix: np.ndarray, routes: list[list[int]]) -> list[list[int]]:
+    """Routes with the children of every one reordered by 2-opt and Or-opt.
+
+    The return of the last route to the base is cut from the moves, so it is free.
+    """
+    trips = [route[1:-1] for route in routes]
+    before = trips_time(matrix, trips, open_last=True)
+    trips = improve_trips(matrix, trips, open_last=True)
+    after = trips_time(matrix, trips, open_last=True)
+    print(f"Local search: {before:.0f} -> {after:.0f}")
+    return [[route[0], *trip, route[-1]] for route, trip in zip(routes, trips)]
+
+
+def first_routes(
+    data: dict, first_solution: str = "PATH_CHEAPEST_ARC", tl: int = 1
+) -> list[list[int]] | None:
+    """Child nodes of every vehicle in the first solution of the unrestricted model"""
+    manager, routing = create_routing_model(dict(data, candidates=None))
+    search_parameters = create_search_parameters(first_solution, "AUTOMATIC", tl)
+    search_parameters.solution_limit = 1
     assignment = routing.SolveWithParameters(search_parameters)
+    if assignment is None:
+        return None
+    return [route[1:-1] for route in get_routes(data, manager, routing, assignment)]
+
+
+def seed_candidates(
+    data: dict,
+    initial_routes: list[list[int]] | None,
+    first_solution: str = "PATH_CHEAPEST_ARC",
+    tl: int = 1,
+) -> list[list[int]] | None:
+    """Routes to start the model with forbidden arcs from, their arcs are allowed.
+
+    They are `initial_routes` if given (like a warm start), otherwise the first
+    solution of the unrestricted model. The candidates of the data are replaced
+    by a copy with the arcs added. Nothing to do without forbidden arcs.
+    """
+    if data["candidates"] is None or data["candidate_penalty"] is not None:
+        return initial_routes
+    if initial_routes is None:
+        initial_routes = first_routes(data, first_solution, tl)
+    if initial_routes is not None:
+        data["candidates"] = [nodes.copy() for nodes in data["candidates"]]
+        add_route_arcs(data["candidates"], initial_routes)
+    return initial_routes
+
+
+def routes_from_moves(
+    moves: list[Coordinates], map_data: Map, capacities: list[int]
+) -> list[list[int]] | None:
+    """Child nodes of every vehicle in the moves of a solution found before.
+
+    The moves are split into trips at the base, points that are not children
+    (like the ones of the paths from the base) are skipped. Trips are given to the
+    first free vehicles they fit in, None if some trip does not fit any.
+    """
+    nodes = {c.coords(): i + 1 for i, c in enumerate(map_data.children)}
+    trips: list[list[int]] = [[]]
+    visited = set()
+    for move in moves:
+        if move == Coordinates(0, 0):
+            trips.append([])
+        elif move in nodes and nodes[move] not in visited:
+            visited.add(nodes[move])
+            trips[-1].append(nodes[move])
+
+    routes: list[list[int]] = [[] for _ in capacities]
+    for trip in filter(None, trips):
+        vehicle = next(
+            (
+                v
+                for v, capacity in enumerate(capacities)
+                if not routes[v] and len(trip) <= capacity
+            ),
+            None,
+        )
+        if vehicle is None:
+            return None
+        routes[vehicle] = trip
+    return routes
+
+
+def _solve_model(manager, routing, search_parameters, initial_routes=None):
+    """Searches from the initial routes if they are given and valid"""
+    if initial_routes is None:
+        return routing.SolveWithParameters(search_parameters)
+    routing.CloseModelWithParameters(search_parameters)
+    initial = routing.ReadAssignmentFromRoutes(
+        [[manager.NodeToIndex(node) for node in route] for route in initial_routes],
+        True,
+    )
+    if initial is None:
+        print("Initial routes are not a valid solution, solving from scratch")
+        return routing.SolveWithParameters(search_parameters)
+    return routing.SolveFromAssignmentWithParameters(initial, search_parameters)
+
+
+def solve(
+    map_data: Map,
+    stack_of_bags: list[Bag],
+    distance_matrix: np.ndarray | None = None,
+    tl: int = 1,
+    first_solution: str = "PATH_CHEAPEST_ARC",
+    metaheuristic: str = "GUIDED_LOCAL_SEARCH",
+    initial_routes: list[list[int]] | None = None,
+    neighbours: int | None = None,
+    candidate_penalty: int | None = None,
+    local_search: bool = True,
+):
+    """Solve the CVRP problem, from `initial_routes` if given.
+
+    With `neighbours` every child may be followed only by its nearest ones, see
+    `candidate_lists`, `seed_candidates` and `create_routing_model`. With
+    `local_search` the order of every route is then improved by `improve_routes`.
+    """
+    # Instantiate the data problem.
+    vertices: list[Coordinates] = [Coordinates(0, 0)] + [
+        c.coords() for c in map_data.children
+    ]
+    data = create_data_model(
+        vertices,
+        map_data.snow_areas,
+        stack_of_bags,
+        distance_matrix,
+        neighbours,
+        candidate_penalty,
+    )
+    initial_routes = seed_candidates(data, initial_routes, first_solution, tl)
+    manager, routing = create_routing_model(data)
+    search_parameters = create_search_parameters(first_solution, metaheuristic, tl)
+
+    # Solve the problem.
+    assignment = _solve_model(manager, routing, search_parameters, initial_routes)
 
     # Print solution on console.
     if assignment:
-        return print_solution(vertices, data, manager, routing, assignment)
+        print_solution(vertices, data, manager, routing, assignment)
+        routes = get_routes(data, manager, routing, assignment)
+        if local_search:
+            routes = improve_routes(data["distance_matrix"], routes)
+        return [vertices[node] for route in routes for node in route]
 
 
-if __name__ == "__main__":
+def _solve_strategy(task: tuple) -> dict:
+    """Runs one strategy of the portfolio in a worker process"""
+    matrix_path, problem, first_solution, metaheuristic, tl, initial_routes = task
+    data = dict(problem, distance_matrix=np.load(matrix_path, mmap_mode="r"))
+    # forbidden arcs need a start of this strategy's own
+    initial_routes = seed_candidates(data, initial_routes, first_solution, tl)
+    manager, routing = create_routing_model(data)
+    # (seconds since the start, objective) of every solution found
+    curve = []
+    start = time.monotonic()
+    routing.AddAtSolutionCallback(
+        lambda: curve.append((time.monotonic() - start, routing.CostVar().Value()))
+    )
+    assignment = _solve_model(
+        manager,
+        routing,
+        create_search_parameters(first_solution, metaheuristic, tl),
+        initial_routes,
+    )
+    result = {
+        "first_solution": first_solution,
+        "metaheuristic": metaheuristic,
+        "objective": None,
+        "routes": None,
+        "curve": curve,
+    }
+    if assignment:
+        result["objective"] = assignment.ObjectiveValue()
+        result["routes"] = get_routes(data, manager, routing, assignment)
+    return result
+
+
+def solve_portfolio(
+    map_data: Map,
+    stack_of_bags: list[Bag],
+    distance_matrix: np.ndarray | None = None,
+    tl: int = 1,
+    strategies: list[tuple[str, str]] = PORTFOLIO,
+    jobs: int | None = None,
+    initial_routes: list[list[int]] | None = None,
+    neighbours: int | None = None,
+    candidate_penalty: int | None = None,
+    local_search: bool = True,
+) -> tuple[list[Coordinates] | None, list[dict]]:
+    """Solves with every strategy in its own process, returns the best moves.
+
+    The workers read the integer matrix saved once to disk instead of getting it
+    pickled, but each of them still holds its own copy inside OR-Tools, so this
+    saves the transfer, not memory. Results of all the strategies (objectives and
+    objective curves) are returned sorted from the best one, the routes are kept
+    only for the best (and improved by `improve_routes` with `local_search`).
+    Only the first strategy of every metaheuristic starts from `initial_routes`,
+    the rest use their own first solution so that they do not repeat it.
+    """
+    vertices: list[Coordinates] = [Coordinates(0, 0)] + [
+        c.coords() for c in map_data.children
+    ]
+    data = create_data_model(
+        vertices,
+        map_data.snow_areas,
+        stack_of_bags,
+        distance_matrix,
+        neighbours,
+        candidate_penalty,
+    )
+    matrix = data.pop("distance_matrix")
+    np.save(PORTFOLIO_MATRIX_PATH, matrix)
+    tasks = []
+    warm_started = set()
+    for first_solution, metaheuristic in strategies:
+        start = None
+        if initial_routes is not None and metaheuristic not in warm_started:
+            warm_started.add(metaheuristic)
+            start = initial_routes
+        tasks.append(
+            (PORTFOLIO_MATRIX_PATH, data, first_solution, metaheuristic, tl, start)
+        )
+    with Pool(min(jobs or os.cpu_count(), len(tasks))) as pool:
+        results = []
+        for result in pool.imap_unordered(_solve_strategy, tasks):
+            print(
+                f"{result['first_solution']} + {result['metaheuristic']}: "
+                f"{result['objective']}"
+            )
+            results.append(result)
+
+    results.sort(key=lambda r: inf if r["objective"] is None else r["objective"])
+    best_routes = results[0]["routes"]
+    for result in results:
+        del result["routes"]
+    if best_routes is None:
+        return None, results
+    if local_search:
+        best_routes = improve_routes(matrix, best_routes)
+    moves = [vertices[node] for route in best_routes for node in route]
+    return moves, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-t", "--time-limit", type=int)
+    parser.add_argument(
+        "-p", "--portfolio", action="store_true", help="run all the PORTFOLIO"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="processes for the portfolio")
+    parser.add_argument(
+        "-w",
+        "--warm-start",
+        nargs="?",
+        const=VRP_SOLUTION_PATH,
+        help="start from the routes of this solution",
+    )
+    parser.add_argument(
+        "-k", "--neighbours", type=int, help="allow arcs only to k nearest children"
+    )
+    parser.add_argument(
+        "--candidate-penalty",
+        type=int,
+        help="penalise arcs to other children by this instead of forbidding them",
+    )
+    parser.add_argument(
+        "--no-local-search",
+        action="store_true",
+        help="keep the order of the children found by the solver",
+    )
+    args = parser.parse_args()
+    tl = args.time_limit
+    if tl is None:
+        tl = int(input("Time limit: "))
+
     sus_map = load_map()
     bags = load_bags()
-    moves = solve(sus_map, bags, tl=int(input("Time limit: ")))
+    initial_routes = None
+    if args.warm_start:
+        previous: Route = load(Route, args.warm_start)
+        bags = previous.stack_of_bags
+        initial_routes = routes_from_moves(
+            previous.moves, sus_map, [len(bag) for bag in bags[::-1]]
+        )
+        if initial_routes is None:
+            print("Trips of the solution do not fit the bags, solving from scratch")
+    if args.portfolio:
+        moves, results = solve_portfolio(
+            sus_map,
+            bags,
+            tl=tl,
+            jobs=args.jobs,
+            initial_routes=initial_routes,
+            neighbours=args.neighbours,
+            candidate_penalty=args.candidate_penalty,
+            local_search=not args.no_local_search,
+        )
+        dump_json_atomic(results, PORTFOLIO_RESULTS_PATH)
+    else:
+        moves = solve(
+            sus_map,
+            bags,
+            tl=tl,
+            initial_routes=initial_routes,
+            neighbours=args.neighbours,
+            candidate_penalty=args.candidate_penalty,
+            local_search=not args.no_local_search,
+        )
     if moves:
         solution = Route(moves=moves, stack_of_bags=bags, map_id=MAP_ID)
         solution.moves = cleanup_jumps_to_start(
             expand(cleanup_jumps_to_start(solution.moves))
         )
-        save(solution, "./data/solution_vrp.json")
+        save(solution, VRP_SOLUTION_PATH)
+
+
+if __name__ == "__main__":
+    main()